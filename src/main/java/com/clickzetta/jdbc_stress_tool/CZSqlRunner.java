@@ -3,21 +3,24 @@ package com.clickzetta.jdbc_stress_tool;
 import com.clickzetta.client.jdbc.core.CZJobMetric;
 import com.clickzetta.client.jdbc.core.CZRequestIdGenerator;
 import com.clickzetta.client.jdbc.core.CZStatement;
-import org.apache.commons.lang3.StringUtils;
 
 import java.sql.Connection;
 import java.sql.ResultSet;
 import java.sql.SQLException;
 import java.sql.Statement;
+import java.util.List;
+import java.util.concurrent.ScheduledFuture;
+import java.util.concurrent.atomic.AtomicBoolean;
 
 public class CZSqlRunner extends SqlRunner {
 
-    public CZSqlRunner(CompositeDataSource cds, String sqlId, String sql, String batchId) {
-        super(cds, sqlId, sql, batchId);
+    public CZSqlRunner(CompositeDataSource cds, String sqlId, String sql, String batchId, int timeout,
+                       boolean statementMetrics) {
+        super(cds, sqlId, sql, batchId, timeout, statementMetrics);
     }
 
     public CZSqlRunner clone(String newSqlId, String newSql, String batchId) {
-        return new CZSqlRunner(cds, newSqlId, newSql, batchId);
+        return new CZSqlRunner(cds, newSqlId, newSql, batchId, timeout, statementMetrics);
     }
 
     @Override
@@ -27,10 +30,17 @@ public class CZSqlRunner extends SqlRunner {
         metric.setThreadName(threadName);
         metric.setSqlId(sqlId);
         metric.setJobId(sqlId);
-        Connection connection = ds.getConnection();
+        metric.setExecutionId(nextExecutionId());
+        long acquireStartMs = System.currentTimeMillis();
+        Connection connection = null;
+        ScheduledFuture<?> watchdog = null;
+        AtomicBoolean cancelled = new AtomicBoolean(false);
         try {
+            connection = ds.getConnection();
+            metric.setConnectionAcquireMs(System.currentTimeMillis() - acquireStartMs);
             Statement statement = connection.createStatement();
             CZStatement czStatement = cds.castToCZStatement(statement);
+            watchdog = scheduleCancel(statement, cancelled);
 
             long startTime = System.currentTimeMillis();
             metric.setClientStartMs(startTime);
@@ -40,22 +50,40 @@ public class CZSqlRunner extends SqlRunner {
             String seperator = "";
             int submitted = 0;
             boolean hasResult;
-            for (String q : SqlUtils.splitSql(sql)) {
+            List<String> statements = splitStatements(sql);
+            boolean children = statementMetrics && statements.size() > 1;
+            int index = 0;
+            for (String q : statements) {
                 if (SqlUtils.isLocal(q)) { // no need to submit, eg. set x=y;
+                    Metric child = startStatement(metric, index++, children);
+                    if (child != null) {
+                        child.setJobId("local");
+                    }
                     czStatement.execute(q);
-                } else if (StringUtils.isNotEmpty(q.trim())) { // run at server side
+                    endStatement(child, 0L, System.currentTimeMillis());
+                } else { // run at server side
                     String jobId = genJobId();
                     sb.append(seperator).append(jobId);
                     seperator = ":";
                     submitted++;
+                    Metric child = startStatement(metric, index++, children);
+                    if (child != null) {
+                        child.setJobId(jobId);
+                    }
                     hasResult = czStatement.execute(q, jobId);
                     metric.setClientResultMs(System.currentTimeMillis());
+                    long rows = 0L;
                     if (hasResult) {
                         ResultSet rs = statement.getResultSet();
                         while (rs.next()) {
-                            resultSize++;
+                            rows++;
                         }
                     }
+                    resultSize += rows;
+                    endStatement(child, rows, metric.getClientResultMs());
+                    if (child != null) {
+                        fillJobProfiling(child, czStatement);
+                    }
                 }
             }
             long endTime = System.currentTimeMillis();
@@ -67,12 +95,12 @@ public class CZSqlRunner extends SqlRunner {
                 fillJobProfiling(metric, czStatement);
             }
         } catch (Throwable e) {
-            long endTime = System.currentTimeMillis();
-            metric.setClientEndMs(endTime);
-            metric.setServerEndMs(endTime);
-            System.err.println("failed to run sql '" + sqlId + "', reason: " + e.getMessage());
+            fail(metric, e, acquireStartMs, connection != null, cancelled.get());
         } finally {
             // 释放资源
+            if (watchdog != null) {
+                watchdog.cancel(false);
+            }
             close(connection);
         }
         return metric;
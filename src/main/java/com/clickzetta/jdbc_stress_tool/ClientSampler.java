@@ -0,0 +1,114 @@
+package com.clickzetta.jdbc_stress_tool;
+
+import org.apache.commons.lang3.StringUtils;
+
+import java.io.BufferedWriter;
+import java.io.FileWriter;
+import java.io.IOException;
+import java.lang.management.GarbageCollectorMXBean;
+import java.lang.management.ManagementFactory;
+import java.lang.management.MemoryUsage;
+import java.lang.management.OperatingSystemMXBean;
+import java.util.concurrent.Executors;
+import java.util.concurrent.ScheduledExecutorService;
+import java.util.concurrent.TimeUnit;
+
+/**
+ * Periodically samples connection pool, gc, heap and cpu of the load generator into a csv file,
+ * so that client side bottlenecks can be told apart from server side ones.
+ */
+public class ClientSampler implements Runnable {
+
+    private static final String HEADER = StringUtils.join(new String[]{
+            "timestamp_ms", "pool_active", "pool_idle", "pool_pending",
+            "gc_count", "gc_pause_ms", "heap_used_mb", "heap_committed_mb", "heap_max_mb",
+            "process_cpu", "thread_count"
+    }, ',');
+
+    private final CompositeDataSource cds;
+    private final BufferedWriter output;
+    private final ScheduledExecutorService scheduler = Executors.newSingleThreadScheduledExecutor(r -> {
+        Thread t = new Thread(r, "client-sampler");
+        t.setDaemon(true);
+        return t;
+    });
+    private long lastGcCount;
+    private long lastGcTimeMs;
+
+    public ClientSampler(CompositeDataSource cds, String output) throws IOException {
+        this.cds = cds;
+        this.output = new BufferedWriter(new FileWriter(output));
+        this.output.write(HEADER);
+        this.output.write("\n");
+    }
+
+    /**
+     * client samples are written next to metric output, eg. data.csv to data_client.csv
+     */
+    public static String outputOf(String metricOutput) {
+        return StringUtils.removeEnd(metricOutput, ".csv") + "_client.csv";
+    }
+
+    public void start(long intervalMs) {
+        long[] gc = gcTotals();
+        lastGcCount = gc[0];
+        lastGcTimeMs = gc[1];
+        scheduler.scheduleAtFixedRate(this, 0, intervalMs, TimeUnit.MILLISECONDS);
+    }
+
+    public void stop() {
+        scheduler.shutdown();
+        try {
+            scheduler.awaitTermination(10, TimeUnit.SECONDS);
+            run();
+            output.close();
+        } catch (InterruptedException | IOException e) {
+            System.err.println("failed to stop client sampler, reason: " + e.getMessage());
+        }
+    }
+
+    @Override
+    public synchronized void run() {
+        try {
+            long[] gc = gcTotals();
+            MemoryUsage heap = ManagementFactory.getMemoryMXBean().getHeapMemoryUsage();
+            output.write(String.format("%d,%d,%d,%d,%d,%d,%.1f,%.1f,%.1f,%.2f,%d",
+                    System.currentTimeMillis(),
+                    cds.getActiveConnections(), cds.getIdleConnections(), cds.getPendingThreads(),
+                    gc[0] - lastGcCount, gc[1] - lastGcTimeMs,
+                    heap.getUsed() / 1048576.0, heap.getCommitted() / 1048576.0, heap.getMax() / 1048576.0,
+                    processCpu(), ManagementFactory.getThreadMXBean().getThreadCount()));
+            output.write("\n");
+            output.flush();
+            lastGcCount = gc[0];
+            lastGcTimeMs = gc[1];
+        } catch (Throwable e) {
+            System.err.println("failed to sample client, reason: " + e.getMessage());
+        }
+    }
+
+    /**
+     * @return collection count and accumulated collection time in ms of all collectors
+     */
+    private static long[] gcTotals() {
+        long count = 0L;
+        long timeMs = 0L;
+        for (GarbageCollectorMXBean gc : ManagementFactory.getGarbageCollectorMXBeans()) {
+            count += Math.max(gc.getCollectionCount(), 0L);
+            timeMs += Math.max(gc.getCollectionTime(), 0L);
+        }
+        return new long[]{count, timeMs};
+    }
+
+    /**
+     * @return recent cpu usage of this jvm in percent of all cores, -1 if not available
+     */
+    private static double processCpu() {
+        OperatingSystemMXBean os = ManagementFactory.getOperatingSystemMXBean();
+        if (os instanceof com.sun.management.OperatingSystemMXBean) {
+            double load = ((com.sun.management.OperatingSystemMXBean) os).getProcessCpuLoad();
+            return load < 0 ? -1 : load * 100;
+        }
+        return -1;
+    }
+}
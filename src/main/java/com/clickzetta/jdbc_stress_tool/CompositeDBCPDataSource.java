@@ -40,6 +40,14 @@ public class CompositeDBCPDataSource implements CompositeDataSource {
         return ds.getNumActive() + ds.getNumIdle();
     }
 
+    public int getIdleConnections() {
+        return ds.getNumIdle();
+    }
+
+    public int getPendingThreads() {
+        return -1; // not exposed by dbcp 1.x
+    }
+
     public CZStatement castToCZStatement(Statement statement) throws SQLException {
         return statement.unwrap(CZStatement.class);
     }
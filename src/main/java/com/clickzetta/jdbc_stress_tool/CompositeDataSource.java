@@ -14,5 +14,12 @@ public interface CompositeDataSource {
 
     int getTotalConnections();
 
+    int getIdleConnections();
+
+    /**
+     * @return threads waiting for a connection, -1 if not exposed by the pool
+     */
+    int getPendingThreads();
+
     CZStatement castToCZStatement(Statement statement) throws SQLException;
 }
@@ -39,6 +39,14 @@ public class CompositeDruidDataSource implements CompositeDataSource {
         return ds.getPoolingCount();
     }
 
+    public int getIdleConnections() {
+        return ds.getPoolingCount();
+    }
+
+    public int getPendingThreads() {
+        return ds.getNotEmptyWaitThreadCount();
+    }
+
     public CZStatement castToCZStatement(Statement statement) throws SQLException {
         return statement.unwrap(CZStatement.class);
     }
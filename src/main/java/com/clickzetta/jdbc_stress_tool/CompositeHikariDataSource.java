@@ -41,6 +41,14 @@ public class CompositeHikariDataSource implements CompositeDataSource {
         return ds.getHikariPoolMXBean().getTotalConnections();
     }
 
+    public int getIdleConnections() {
+        return ds.getHikariPoolMXBean().getIdleConnections();
+    }
+
+    public int getPendingThreads() {
+        return ds.getHikariPoolMXBean().getThreadsAwaitingConnection();
+    }
+
     public CZStatement castToCZStatement(Statement statement) throws SQLException {
         return statement.unwrap(CZStatement.class);
     }
@@ -35,6 +35,18 @@ public class Config {
     String driverClass;
     String prefix;
     double failureRate;
+    int timeout; // query timeout in seconds, 0 means no timeout
+    boolean statementMetrics; // one extra metric per statement of multi-statement sql files
+    long sampleInterval = 1000L; // client sampling interval in ms, 0 means no sampling
+    String replayLog; // query log to replay instead of repeating sql files
+    double replaySpeed = 1.0; // 1 means original timing, 0 means as fast as possible
+    boolean replaySession;
+    String ingestTable; // target table of ingestion mode, null means query mode
+    String ingestSchema; // column spec of generated rows, eg. id:bigint,name:string(16)
+    String ingestData; // csv files or folders to ingest instead of generated rows
+    long ingestRows = 100000L; // generated rows in total
+    int batchSize = 1000;
+    int commitInterval; // batches per commit, 0 means auto commit
 
     public void loadFromFile(String configFile) throws IOException {
         FileReader reader = new FileReader(configFile);
@@ -55,6 +67,18 @@ public class Config {
         output = prop.getProperty("output");
         prefix = prop.getProperty("prefix", "");
         failureRate = Double.parseDouble(prop.getProperty("failure", "10.0"));
+        timeout = Integer.parseInt(prop.getProperty("timeout", "0"));
+        statementMetrics = Boolean.parseBoolean(prop.getProperty("statements", "false"));
+        sampleInterval = Long.parseLong(prop.getProperty("sample", "1000"));
+        replayLog = StringUtils.trimToNull(prop.getProperty("replay"));
+        replaySpeed = Double.parseDouble(prop.getProperty("speed", "1.0"));
+        replaySession = Boolean.parseBoolean(prop.getProperty("session", "false"));
+        ingestTable = StringUtils.trimToNull(prop.getProperty("ingest"));
+        ingestSchema = StringUtils.trimToNull(prop.getProperty("schema"));
+        ingestData = StringUtils.trimToNull(prop.getProperty("data"));
+        ingestRows = Long.parseLong(prop.getProperty("rows", "100000"));
+        batchSize = Integer.parseInt(prop.getProperty("batch", "1000"));
+        commitInterval = Integer.parseInt(prop.getProperty("commit", "0"));
         String sqlPath = prop.getProperty("sql");
         if (sqlPath != null) {
             loadSqlFiles(sqlPath);
@@ -99,12 +123,44 @@ public class Config {
                 break;
             }
         }
-        System.out.println("repeat  : " + repeatCount);
-        if (sqls.isEmpty()) {
-            throw new IllegalArgumentException("no sql specified");
+        if (ingestTable != null) {
+            System.out.println("ingest  : " + ingestTable);
+            if (ingestData != null) {
+                System.out.println("data    : " + ingestData);
+            } else if (ingestSchema != null) {
+                System.out.println("schema  : " + ingestSchema);
+                System.out.println("rows    : " + ingestRows);
+            } else {
+                throw new IllegalArgumentException("either schema or data is required for ingestion");
+            }
+            if (batchSize <= 0) {
+                throw new IllegalArgumentException("batch size must be positive");
+            }
+            System.out.println("batch   : " + batchSize + " rows");
+            System.out.println("commit  : " + (commitInterval > 0 ? "every " + commitInterval + " batches" : "auto"));
+        } else if (replayLog != null) {
+            if (!new File(replayLog).isFile()) {
+                throw new IllegalArgumentException("query log not found: " + replayLog);
+            }
+            if (replaySpeed < 0) {
+                throw new IllegalArgumentException("replay speed must not be negative");
+            }
+            System.out.println("replay  : " + replayLog);
+            System.out.println("speed   : " + (replaySpeed > 0 ? replaySpeed + "x" : "unlimited"));
+            System.out.println("session : " + (replaySession ? "sequential" : "ignored"));
+        } else {
+            System.out.println("repeat  : " + repeatCount);
+            if (sqls.isEmpty()) {
+                throw new IllegalArgumentException("no sql specified");
+            }
+            System.out.println("total   : " + repeatCount * sqls.keySet().size());
         }
-        System.out.println("total   : " + repeatCount * sqls.keySet().size());
         System.out.println("stop if : fail > " + failureRate + "%");
+        if (timeout < 0) {
+            throw new IllegalArgumentException("timeout must not be negative");
+        }
+        System.out.println("timeout : " + (timeout > 0 ? timeout + "s" : "none"));
+        System.out.println("per stmt: " + statementMetrics);
         if (output == null) {
             throw new IllegalArgumentException("output is null");
         }
@@ -116,6 +172,9 @@ public class Config {
             }
         }
         System.out.println("output  : " + output);
+        if (sampleInterval > 0) {
+            System.out.println("sampling: every " + sampleInterval + "ms to " + ClientSampler.outputOf(output));
+        }
     }
 
     void loadSqlFiles(String sqlPath) throws IOException {
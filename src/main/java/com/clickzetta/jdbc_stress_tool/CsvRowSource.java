@@ -0,0 +1,87 @@
+package com.clickzetta.jdbc_stress_tool;
+
+import org.apache.commons.csv.CSVFormat;
+import org.apache.commons.csv.CSVParser;
+import org.apache.commons.csv.CSVRecord;
+import org.apache.commons.io.FileUtils;
+
+import java.io.File;
+import java.io.IOException;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.util.ArrayList;
+import java.util.Iterator;
+import java.util.List;
+
+/**
+ * Streams rows from local csv files with header, files must share the same header.
+ * Values are bound as strings, empty values as null.
+ */
+public class CsvRowSource implements RowSource {
+
+    private final List<File> files = new ArrayList<>();
+    private int fileIndex = 0;
+    private List<String> columns;
+    private CSVParser parser;
+    private Iterator<CSVRecord> records;
+
+    public CsvRowSource(String dataPath) throws IOException {
+        for (String p : dataPath.split(",")) {
+            File f = new File(p);
+            if (f.isFile()) {
+                files.add(f);
+            } else if (f.isDirectory()) {
+                files.addAll(FileUtils.listFiles(f, new String[]{"csv"}, true));
+            }
+        }
+        if (files.isEmpty()) {
+            throw new IllegalArgumentException("no csv file found in " + dataPath);
+        }
+        openNext();
+        columns = new ArrayList<>(parser.getHeaderNames());
+    }
+
+    @Override
+    public List<String> getColumns() {
+        return columns;
+    }
+
+    @Override
+    public synchronized Object[] next() throws IOException {
+        while (records != null) {
+            if (records.hasNext()) {
+                CSVRecord record = records.next();
+                Object[] row = new Object[columns.size()];
+                for (int i = 0; i < row.length && i < record.size(); i++) {
+                    String value = record.get(i);
+                    row[i] = value.isEmpty() ? null : value;
+                }
+                return row;
+            }
+            openNext();
+        }
+        return null;
+    }
+
+    @Override
+    public synchronized void close() throws IOException {
+        if (parser != null) {
+            parser.close();
+            parser = null;
+        }
+        records = null;
+    }
+
+    private void openNext() throws IOException {
+        close();
+        if (fileIndex < files.size()) {
+            File f = files.get(fileIndex++);
+            parser = CSVFormat.DEFAULT.withFirstRecordAsHeader()
+                    .parse(Files.newBufferedReader(f.toPath(), StandardCharsets.UTF_8));
+            if (columns != null && !columns.equals(parser.getHeaderNames())) {
+                throw new IllegalArgumentException("header of " + f + " differs from " + files.get(0));
+            }
+            records = parser.iterator();
+        }
+    }
+}
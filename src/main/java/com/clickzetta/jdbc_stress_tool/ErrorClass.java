@@ -0,0 +1,132 @@
+package com.clickzetta.jdbc_stress_tool;
+
+import org.apache.commons.lang3.StringUtils;
+
+import java.net.SocketException;
+import java.net.SocketTimeoutException;
+import java.net.UnknownHostException;
+import java.sql.SQLException;
+import java.sql.SQLNonTransientConnectionException;
+import java.sql.SQLTimeoutException;
+import java.sql.SQLTransientConnectionException;
+
+public enum ErrorClass {
+    NONE,
+    TIMEOUT,
+    THROTTLED,
+    POOL_EXHAUSTED,
+    CONNECTION,
+    SQL,
+    CLIENT;
+
+    private static final String[] TIMEOUT_KEYWORDS = {
+            "timeout", "timed out", "wait millis"
+    };
+    private static final String[] THROTTLE_KEYWORDS = {
+            "throttl", "too many", "rate limit", "quota", "overload", "concurrency limit", "resource exhausted"
+    };
+
+    /**
+     * @param connected whether a connection was borrowed from the pool before the failure
+     * @param cancelled whether the query was cancelled by the timeout watchdog
+     */
+    public static ErrorClass classify(Throwable e, boolean connected, boolean cancelled) {
+        if (cancelled) {
+            return TIMEOUT;
+        }
+        SQLException sqlException = findSqlException(e);
+        if (!connected) {
+            // pools also report an unreachable database as a timeout while waiting for a connection,
+            // with the last connection failure as cause
+            if (hasConnectionFailure(e)) {
+                return CONNECTION;
+            }
+            // hikari, dbcp and druid all report an exhausted pool as a timeout while waiting for a connection
+            if (sqlException instanceof SQLTransientConnectionException || containsAny(e, TIMEOUT_KEYWORDS)) {
+                return POOL_EXHAUSTED;
+            }
+            return CONNECTION;
+        }
+        if (sqlException == null) {
+            return CLIENT;
+        }
+        String sqlState = StringUtils.defaultString(sqlException.getSQLState());
+        if (sqlException instanceof SQLTimeoutException || sqlState.startsWith("HYT") || sqlState.equals("57014")) {
+            return TIMEOUT;
+        }
+        if (sqlState.startsWith("53") || containsAny(e, THROTTLE_KEYWORDS)) {
+            return THROTTLED;
+        }
+        if (sqlException instanceof SQLTransientConnectionException
+                || sqlException instanceof SQLNonTransientConnectionException
+                || sqlState.startsWith("08")) {
+            return CONNECTION;
+        }
+        if (containsAny(e, TIMEOUT_KEYWORDS)) {
+            return TIMEOUT;
+        }
+        return SQL;
+    }
+
+    /**
+     * sql state if present, otherwise vendor error code, otherwise exception class name
+     */
+    public static String codeOf(Throwable e) {
+        SQLException sqlException = findSqlException(e);
+        if (sqlException == null) {
+            return e.getClass().getSimpleName();
+        }
+        if (StringUtils.isNotEmpty(sqlException.getSQLState())) {
+            return sqlException.getSQLState();
+        }
+        if (sqlException.getErrorCode() != 0) {
+            return String.valueOf(sqlException.getErrorCode());
+        }
+        return sqlException.getClass().getSimpleName();
+    }
+
+    private static SQLException findSqlException(Throwable e) {
+        for (Throwable t = e; t != null; t = t.getCause()) {
+            if (t instanceof SQLException) {
+                return (SQLException) t;
+            }
+            if (t.getCause() == t) {
+                break;
+            }
+        }
+        return null;
+    }
+
+    private static boolean hasConnectionFailure(Throwable e) {
+        for (Throwable t = e; t != null; t = t.getCause()) {
+            if (t instanceof SocketException || t instanceof SocketTimeoutException || t instanceof UnknownHostException) {
+                return true;
+            }
+            if (t instanceof SQLException) {
+                String sqlState = StringUtils.defaultString(((SQLException) t).getSQLState());
+                if (sqlState.startsWith("08") || (t != e && t instanceof SQLNonTransientConnectionException)) {
+                    return true;
+                }
+            }
+            if (t.getCause() == t) {
+                break;
+            }
+        }
+        return false;
+    }
+
+    private static boolean containsAny(Throwable e, String[] keywords) {
+        for (Throwable t = e; t != null; t = t.getCause()) {
+            String message = StringUtils.defaultString(t.getMessage()).toLowerCase();
+            for (String keyword : keywords) {
+                if (message.contains(keyword)) {
+                    return true;
+                }
+            }
+            if (t.getCause() == t) {
+                break;
+            }
+        }
+        return false;
+    }
+}
@@ -0,0 +1,109 @@
+package com.clickzetta.jdbc_stress_tool;
+
+import org.apache.commons.lang3.RandomStringUtils;
+
+import java.math.BigDecimal;
+import java.sql.Date;
+import java.sql.Timestamp;
+import java.util.ArrayList;
+import java.util.List;
+import java.util.concurrent.ThreadLocalRandom;
+import java.util.concurrent.atomic.AtomicLong;
+import java.util.regex.Matcher;
+import java.util.regex.Pattern;
+
+/**
+ * Generates random rows from a column spec like
+ * "id:bigint,name:string(16),price:decimal(10,2),flag:boolean,day:date,ts:timestamp".
+ */
+public class GeneratedRowSource implements RowSource {
+
+    public enum ColumnType {
+        INT,
+        BIGINT,
+        DOUBLE,
+        DECIMAL,
+        STRING,
+        BOOLEAN,
+        DATE,
+        TIMESTAMP;
+    }
+
+    private static final Pattern COLUMN = Pattern.compile("^\\s*(\\w+)\\s*:\\s*(\\w+)\\s*(?:\\((\\d+)\\s*(?:,\\s*(\\d+))?\\))?\\s*$");
+    // 2000-01-01 to 2100-01-01
+    private static final long MIN_MS = 946684800000L;
+    private static final long MAX_MS = 4102444800000L;
+
+    private final List<String> columns = new ArrayList<>();
+    private final List<ColumnType> types = new ArrayList<>();
+    private final List<int[]> lengths = new ArrayList<>();
+    private final AtomicLong remaining;
+
+    public GeneratedRowSource(String schema, long rows) {
+        // split on commas outside of parentheses
+        for (String spec : schema.split(",(?![^(]*\\))")) {
+            Matcher matcher = COLUMN.matcher(spec);
+            if (!matcher.matches()) {
+                throw new IllegalArgumentException("invalid column spec: " + spec);
+            }
+            String type = matcher.group(2).toUpperCase();
+            if (type.equals("VARCHAR")) {
+                type = "STRING";
+            }
+            columns.add(matcher.group(1));
+            types.add(ColumnType.valueOf(type));
+            int precision = matcher.group(3) == null ? 16 : Integer.parseInt(matcher.group(3));
+            int scale = matcher.group(4) == null ? 2 : Integer.parseInt(matcher.group(4));
+            lengths.add(new int[]{precision, scale});
+        }
+        this.remaining = new AtomicLong(rows);
+    }
+
+    @Override
+    public List<String> getColumns() {
+        return columns;
+    }
+
+    @Override
+    public Object[] next() {
+        if (remaining.getAndDecrement() <= 0) {
+            return null;
+        }
+        ThreadLocalRandom random = ThreadLocalRandom.current();
+        Object[] row = new Object[columns.size()];
+        for (int i = 0; i < row.length; i++) {
+            int[] length = lengths.get(i);
+            switch (types.get(i)) {
+                case INT:
+                    row[i] = random.nextInt();
+                    break;
+                case BIGINT:
+                    row[i] = random.nextLong();
+                    break;
+                case DOUBLE:
+                    row[i] = random.nextDouble() * 1e6;
+                    break;
+                case DECIMAL:
+                    row[i] = BigDecimal.valueOf(random.nextLong((long) Math.pow(10, Math.min(length[0], 18))), length[1]);
+                    break;
+                case STRING:
+                    row[i] = RandomStringUtils.randomAlphanumeric(length[0]);
+                    break;
+                case BOOLEAN:
+                    row[i] = random.nextBoolean();
+                    break;
+                case DATE:
+                    row[i] = new Date(random.nextLong(MIN_MS, MAX_MS) / 86400000L * 86400000L);
+                    break;
+                case TIMESTAMP:
+                    row[i] = new Timestamp(random.nextLong(MIN_MS, MAX_MS));
+                    break;
+            }
+        }
+        return row;
+    }
+
+    @Override
+    public void close() {
+    }
+}
@@ -0,0 +1,64 @@
+package com.clickzetta.jdbc_stress_tool;
+
+import lombok.Getter;
+import lombok.Setter;
+import org.apache.commons.lang3.StringUtils;
+
+public class IngestMetric {
+
+  @Getter
+  @Setter
+  private String threadName;
+  @Getter
+  @Setter
+  private String tableName;
+  @Getter
+  @Setter
+  private long batchId;
+  @Getter
+  @Setter
+  private boolean isSuccess = false;
+  @Getter
+  @Setter
+  private long batchRows;
+  @Getter
+  @Setter
+  private long batchBytes;
+  @Getter
+  @Setter
+  private long clientStartMs;
+  @Getter
+  @Setter
+  private long clientEndMs;
+  @Getter
+  @Setter
+  private long commitMs; // time spent in commit after this batch, 0 if not committed
+  @Getter
+  @Setter
+  private ErrorClass errorClass = ErrorClass.NONE;
+  @Getter
+  @Setter
+  private String errorCode = "";
+
+  @Getter
+  private static final String header = StringUtils.join(new String[]{
+          "thread_name", "table_name", "batch_id", "is_success",
+          "batch_rows", "batch_bytes", "batch_duration_ms", "commit_ms",
+          "client_start_ms", "client_end_ms", "error_class", "error_code"
+  }, ',');
+
+  public IngestMetric() {
+  }
+
+  public long getBatchDuration() {
+    return clientEndMs - clientStartMs;
+  }
+
+  @Override
+  public String toString() {
+    return String.format("%s,%s,%d,%s,%d,%d,%d,%d,%d,%d,%s,%s",
+            threadName, tableName, batchId, isSuccess,
+            batchRows, batchBytes, clientEndMs - clientStartMs, commitMs,
+            clientStartMs, clientEndMs, errorClass, StringUtils.replaceChars(errorCode, ",\r\n", "   "));
+  }
+}
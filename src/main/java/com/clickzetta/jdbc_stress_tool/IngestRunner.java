@@ -0,0 +1,186 @@
+package com.clickzetta.jdbc_stress_tool;
+
+import org.apache.commons.lang3.StringUtils;
+
+import java.sql.Connection;
+import java.sql.PreparedStatement;
+import java.sql.SQLException;
+import java.util.ArrayList;
+import java.util.Collections;
+import java.util.List;
+import java.util.concurrent.BlockingQueue;
+import java.util.concurrent.Callable;
+import java.util.concurrent.atomic.AtomicLong;
+
+/**
+ * One writer thread of ingestion mode, pushes rows from source through PreparedStatement.executeBatch
+ * until source is exhausted, reporting one metric per batch.
+ */
+public class IngestRunner implements Callable<Void> {
+
+    private static final AtomicLong BATCH_ID = new AtomicLong(0L);
+
+    CompositeDataSource cds;
+    Config config;
+    RowSource source;
+    BlockingQueue<IngestMetric> metrics;
+
+    public IngestRunner(CompositeDataSource cds, Config config, RowSource source, BlockingQueue<IngestMetric> metrics) {
+        this.cds = cds;
+        this.config = config;
+        this.source = source;
+        this.metrics = metrics;
+    }
+
+    static String insertSql(String table, List<String> columns) {
+        return "INSERT INTO " + table + " (" + StringUtils.join(columns, ", ") + ") VALUES (" +
+                StringUtils.join(Collections.nCopies(columns.size(), "?"), ", ") + ")";
+    }
+
+    @Override
+    public Void call() throws Exception {
+        String threadName = Thread.currentThread().getName();
+        int columnCount = source.getColumns().size();
+        boolean autoCommit = config.commitInterval <= 0;
+        // batches executed but not committed yet, reported only once their commit succeeds or fails
+        List<IngestMetric> uncommitted = new ArrayList<>();
+        Connection connection = null;
+        try {
+            connection = cds.getDataSource().getConnection();
+            connection.setAutoCommit(autoCommit);
+            PreparedStatement statement = connection.prepareStatement(insertSql(config.ingestTable, source.getColumns()));
+            while (true) {
+                IngestMetric metric = new IngestMetric();
+                metric.setThreadName(threadName);
+                metric.setTableName(config.ingestTable);
+                metric.setBatchId(BATCH_ID.incrementAndGet());
+                long rows = 0L;
+                long bytes = 0L;
+                Object[] row;
+                while (rows < config.batchSize && (row = source.next()) != null) {
+                    for (int i = 0; i < columnCount; i++) {
+                        statement.setObject(i + 1, row[i]);
+                        bytes += RowSource.sizeOf(row[i]);
+                    }
+                    statement.addBatch();
+                    rows++;
+                }
+                if (rows == 0) {
+                    break;
+                }
+                metric.setBatchRows(rows);
+                metric.setBatchBytes(bytes);
+                metric.setClientStartMs(System.currentTimeMillis());
+                try {
+                    statement.executeBatch();
+                    metric.setClientEndMs(System.currentTimeMillis());
+                    metric.setSuccess(true);
+                } catch (Throwable e) {
+                    fail(metric, e, true);
+                    clearBatch(statement);
+                }
+                if (autoCommit) {
+                    metrics.put(metric);
+                } else if (!metric.isSuccess()) {
+                    // the failed batch rolls back every uncommitted batch before it
+                    rollback(connection, uncommitted, metric);
+                    metrics.put(metric);
+                } else {
+                    uncommitted.add(metric);
+                    if (uncommitted.size() >= config.commitInterval) {
+                        commit(connection, uncommitted);
+                    }
+                }
+            }
+            if (!uncommitted.isEmpty()) {
+                commit(connection, uncommitted);
+            }
+        } catch (Throwable e) {
+            // failed to connect, prepare or read rows, this writer stops
+            IngestMetric metric = new IngestMetric();
+            metric.setThreadName(threadName);
+            metric.setTableName(config.ingestTable);
+            metric.setBatchId(BATCH_ID.incrementAndGet());
+            metric.setClientStartMs(System.currentTimeMillis());
+            fail(metric, e, connection != null);
+            if (!uncommitted.isEmpty()) {
+                rollback(connection, uncommitted, metric);
+            }
+            metrics.put(metric);
+        } finally {
+            close(connection);
+        }
+        return null;
+    }
+
+    /**
+     * commits uncommitted batches and reports them, commit time is recorded on the last batch
+     */
+    private void commit(Connection connection, List<IngestMetric> uncommitted) throws InterruptedException {
+        IngestMetric last = uncommitted.get(uncommitted.size() - 1);
+        long startTime = System.currentTimeMillis();
+        try {
+            connection.commit();
+            last.setCommitMs(System.currentTimeMillis() - startTime);
+        } catch (Throwable e) {
+            last.setCommitMs(System.currentTimeMillis() - startTime);
+            fail(last, e, true, last.getClientEndMs());
+            rollback(connection, uncommitted, last);
+            return;
+        }
+        for (IngestMetric metric : uncommitted) {
+            metrics.put(metric);
+        }
+        uncommitted.clear();
+    }
+
+    /**
+     * rolls back and reports uncommitted batches as failed with the error of cause
+     */
+    private void rollback(Connection connection, List<IngestMetric> uncommitted, IngestMetric cause)
+            throws InterruptedException {
+        try {
+            connection.rollback();
+        } catch (SQLException e) {
+            System.err.println("failed to rollback, reason: " + e.getMessage());
+        }
+        for (IngestMetric metric : uncommitted) {
+            metric.setSuccess(false);
+            metric.setErrorClass(cause.getErrorClass());
+            metric.setErrorCode(cause.getErrorCode());
+            metrics.put(metric);
+        }
+        uncommitted.clear();
+    }
+
+    private void fail(IngestMetric metric, Throwable e, boolean connected) {
+        fail(metric, e, connected, System.currentTimeMillis());
+    }
+
+    private void fail(IngestMetric metric, Throwable e, boolean connected, long endTime) {
+        metric.setClientEndMs(endTime);
+        metric.setSuccess(false);
+        metric.setErrorClass(ErrorClass.classify(e, connected, false));
+        metric.setErrorCode(ErrorClass.codeOf(e));
+        System.err.println("failed to ingest batch " + metric.getBatchId() + " into '" + config.ingestTable + "', " +
+                metric.getErrorClass() + " (" + metric.getErrorCode() + "), reason: " + e.getMessage());
+    }
+
+    private static void clearBatch(PreparedStatement statement) {
+        try {
+            statement.clearBatch();
+        } catch (SQLException e) {
+            System.err.println("failed to clear batch, reason: " + e.getMessage());
+        }
+    }
+
+    private static void close(Connection connection) {
+        if (connection != null) {
+            try {
+                connection.close();
+            } catch (SQLException e) {
+                System.err.println("failed to close connection, reason: " + e.getMessage());
+            }
+        }
+    }
+}
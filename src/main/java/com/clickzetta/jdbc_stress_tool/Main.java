@@ -6,6 +6,10 @@ import org.apache.commons.lang3.StringUtils;
 import javax.sql.DataSource;
 import java.io.*;
 import java.sql.Connection;
+import java.util.ArrayList;
+import java.util.Collections;
+import java.util.EnumMap;
+import java.util.List;
 import java.util.Map;
 import java.util.concurrent.*;
 
@@ -15,13 +19,18 @@ public class Main {
     Config config;
     SqlRunner initSqlRunner;
 
+    // replay and ingestion need some samples before judging failure rate
+    private static final long MIN_SAMPLES = 100L;
+
     Main(Config config) {
         this.config = config;
         this.cds = CompositeDataSourceFactory.create(config);
         if (config.jdbcUrl.startsWith("jdbc:clickzetta://")) {
-            this.initSqlRunner = new CZSqlRunner(cds, "init", "select 1;", config.prefix);
+            this.initSqlRunner = new CZSqlRunner(cds, "init", "select 1;", config.prefix, config.timeout,
+                    config.statementMetrics);
         } else {
-            this.initSqlRunner = new SqlRunner(cds, "init", "select 1;", config.prefix);
+            this.initSqlRunner = new SqlRunner(cds, "init", "select 1;", config.prefix, config.timeout,
+                    config.statementMetrics);
         }
     }
 
@@ -96,35 +105,57 @@ public class Main {
         System.out.println("running sqls:");
         System.out.printf("[%s] begin ...%n", java.time.LocalDateTime.now());
         BufferedWriter output = new BufferedWriter(new FileWriter(config.output));
+        ClientSampler sampler = startSampler();
         output.write(Metric.getHeader());
         output.write("\n");
 
         ExecutorService executorService = Executors.newFixedThreadPool(config.threadCount);
-        CompletionService completionService = new ExecutorCompletionService(executorService);
+        CompletionService<Metric> completionService = new ExecutorCompletionService<>(executorService);
         long startTimestamp = System.currentTimeMillis();
+        QueryLogReplayer replayer = null;
         long total = config.repeatCount * config.sqls.size();
         long fail = 0L;
+        long i = 0L;
+        EnumMap<ErrorClass, Long> failByClass = new EnumMap<>(ErrorClass.class);
         try {
-            for (int i = 0; i < config.repeatCount; i++) {
-                for (Map.Entry<String, String> entry : config.sqls.entrySet()) {
-                    completionService.submit(initSqlRunner.clone(entry.getKey(), entry.getValue(), config.prefix));
+            if (config.replayLog != null) {
+                // total is unknown until the whole query log is read
+                replayer = new QueryLogReplayer(config, initSqlRunner, completionService);
+                replayer.start();
+            } else {
+                for (int r = 0; r < config.repeatCount; r++) {
+                    for (Map.Entry<String, String> entry : config.sqls.entrySet()) {
+                        completionService.submit(initSqlRunner.clone(entry.getKey(), entry.getValue(), config.prefix));
+                    }
                 }
+                executorService.shutdown();
             }
-            executorService.shutdown();
             long t = System.currentTimeMillis();
-            int c = 0;
+            long c = 0;
             double q = 0;
-            for (int i = 0; i < total; i++) {
-                Metric metric = (Metric)completionService.take().get();
-                output.write(metric.toString());
-                output.write("\n");
-                if (!metric.isSuccess()) {
-                    fail++;
-                    // abort test if failure rate is too high
-                    if (100.0 * fail / total > config.failureRate) {
-                        System.err.println("too many failed sqls, test aborted.");
-                        output.close();
-                        System.exit(1);
+            while (replayer == null ? i < total : !replayer.isDone() || i < replayer.getSubmitted()) {
+                Future<Metric> future = completionService.poll(1, TimeUnit.SECONDS);
+                if (future != null) {
+                    Metric metric = future.get();
+                    output.write(metric.toString());
+                    output.write("\n");
+                    if (metric.getStatements() != null) {
+                        for (Metric child : metric.getStatements()) {
+                            output.write(child.toString());
+                            output.write("\n");
+                        }
+                    }
+                    i++;
+                    if (!metric.isSuccess()) {
+                        fail++;
+                        failByClass.merge(metric.getErrorClass(), 1L, Long::sum);
+                        // abort test if failure rate is too high
+                        long base = replayer == null ? total : Math.max(i, MIN_SAMPLES);
+                        if (100.0 * fail / base > config.failureRate) {
+                            System.err.println("too many failed sqls, test aborted.");
+                            output.close();
+                            System.exit(1);
+                        }
                     }
                 }
                 if (System.currentTimeMillis() - t >= 10 * 1000) {
@@ -132,9 +163,12 @@ public class Main {
                     c = i;
                     t = System.currentTimeMillis();
                     System.out.printf("[%s] %d of %d SQLs executed, %d failed, approx qps %.3f ...%n",
-                            java.time.LocalDateTime.now(), i, total, fail, q);
+                            java.time.LocalDateTime.now(), i, replayer == null ? total : replayer.getSubmitted(), fail, q);
                 }
             }
+            if (replayer != null) {
+                executorService.shutdown();
+            }
         } catch (InterruptedException e) {
             System.err.println(e.getMessage());
             output.close();
@@ -142,15 +176,130 @@ public class Main {
         } catch (ExecutionException | IOException e) {
             System.err.println(e.getMessage());
         }
+        if (replayer != null) {
+            total = i;
+        }
         long endTimestamp = System.currentTimeMillis();
         long duration = endTimestamp - startTimestamp;
         System.out.printf("[%s] done%n", java.time.LocalDateTime.now());
         System.out.println("summary:");
         System.out.println("elapsed: " + duration + "ms");
         System.out.println("sql    : " + total);
-        System.out.println("failed : " + fail + " (" + (100.0 * fail / total) + "%)");
+        System.out.println("failed : " + fail + " (" + (100.0 * fail / Math.max(total, 1L)) + "%)");
+        for (Map.Entry<ErrorClass, Long> entry : failByClass.entrySet()) {
+            System.out.println("  " + entry.getKey() + ": " + entry.getValue());
+        }
         System.out.printf("qps    : %.3f%n", 1.0 * total / duration * 1000);
         output.close();
+        stopSampler(sampler);
+        if (replayer != null && replayer.getError() != null) {
+            // replay stopped before the end of query log, the summary above is incomplete
+            System.err.println("replay aborted after " + total + " sqls, reason: " + replayer.getError().getMessage());
+            System.exit(1);
+        }
+    }
+
+    void ingest() throws IOException {
+        System.out.println("ingesting rows:");
+        System.out.printf("[%s] begin ...%n", java.time.LocalDateTime.now());
+        BufferedWriter output = new BufferedWriter(new FileWriter(config.output));
+        ClientSampler sampler = startSampler();
+        output.write(IngestMetric.getHeader());
+        output.write("\n");
+
+        RowSource source = config.ingestData != null ? new CsvRowSource(config.ingestData)
+                : new GeneratedRowSource(config.ingestSchema, config.ingestRows);
+        BlockingQueue<IngestMetric> metrics = new LinkedBlockingQueue<>();
+        ExecutorService executorService = Executors.newFixedThreadPool(config.threadCount);
+        long startTimestamp = System.currentTimeMillis();
+        for (int i = 0; i < config.threadCount; i++) {
+            executorService.submit(new IngestRunner(cds, config, source, metrics));
+        }
+        executorService.shutdown();
+        long batches = 0L;
+        long fail = 0L;
+        long rows = 0L;
+        long bytes = 0L;
+        ArrayList<Long> latencies = new ArrayList<>();
+        try {
+            long t = System.currentTimeMillis();
+            long c = 0L;
+            while (true) {
+                boolean finished = executorService.isTerminated();
+                IngestMetric metric = metrics.poll(1, TimeUnit.SECONDS);
+                if (metric != null) {
+                    output.write(metric.toString());
+                    output.write("\n");
+                    batches++;
+                    if (metric.isSuccess()) {
+                        rows += metric.getBatchRows();
+                        bytes += metric.getBatchBytes();
+                        latencies.add(metric.getBatchDuration());
+                    } else {
+                        fail++;
+                        if (100.0 * fail / Math.max(batches, MIN_SAMPLES) > config.failureRate) {
+                            System.err.println("too many failed batches, test aborted.");
+                            output.close();
+                            System.exit(1);
+                        }
+                    }
+                } else if (finished) {
+                    break;
+                }
+                if (System.currentTimeMillis() - t >= 10 * 1000) {
+                    double r = 1000.0 * (rows - c) / (System.currentTimeMillis() - t);
+                    c = rows;
+                    t = System.currentTimeMillis();
+                    System.out.printf("[%s] %d rows in %d batches ingested, %d batches failed, approx rows/s %.1f ...%n",
+                            java.time.LocalDateTime.now(), rows, batches, fail, r);
+                }
+            }
+        } catch (InterruptedException e) {
+            System.err.println(e.getMessage());
+            output.close();
+            System.exit(1);
+        } finally {
+            source.close();
+        }
+        long endTimestamp = System.currentTimeMillis();
+        long duration = Math.max(endTimestamp - startTimestamp, 1L);
+        Collections.sort(latencies);
+        System.out.printf("[%s] done%n", java.time.LocalDateTime.now());
+        System.out.println("summary:");
+        System.out.println("elapsed: " + duration + "ms");
+        System.out.println("rows   : " + rows);
+        System.out.println("batches: " + batches);
+        System.out.println("failed : " + fail + " (" + (100.0 * fail / Math.max(batches, 1L)) + "%)");
+        System.out.printf("rows/s : %.1f%n", 1000.0 * rows / duration);
+        System.out.printf("MB/s   : %.3f%n", 1000.0 * bytes / duration / 1024 / 1024);
+        System.out.printf("latency: P50 %dms, P95 %dms, P99 %dms, max %dms%n",
+                percentile(latencies, 50), percentile(latencies, 95), percentile(latencies, 99),
+                percentile(latencies, 100));
+        output.close();
+        stopSampler(sampler);
+    }
+
+    private ClientSampler startSampler() throws IOException {
+        if (config.sampleInterval <= 0) {
+            return null;
+        }
+        ClientSampler sampler = new ClientSampler(cds, ClientSampler.outputOf(config.output));
+        sampler.start(config.sampleInterval);
+        return sampler;
+    }
+
+    private static void stopSampler(ClientSampler sampler) {
+        if (sampler != null) {
+            sampler.stop();
+        }
+    }
+
+    private static long percentile(List<Long> sorted, int p) {
+        if (sorted.isEmpty()) {
+            return 0L;
+        }
+        int index = (int) Math.ceil(p / 100.0 * sorted.size()) - 1;
+        return sorted.get(Math.max(0, Math.min(index, sorted.size() - 1)));
     }
 
     public static void main(String[] args) throws IOException {
@@ -225,6 +374,67 @@ public class Main {
                         .desc("test will be aborted if failure rate exceeds this value")
                         .hasArg(true).required(false)
                         .build())
+                .addOption(Option.builder()
+                        .longOpt("replay")
+                        .desc("query log to replay instead of sql files, csv or jsonl with timestamp, sql or sql_id, "
+                                + "optional user, session and duration_ms")
+                        .hasArg(true).required(false)
+                        .build())
+                .addOption(Option.builder()
+                        .longOpt("speed")
+                        .desc("replay speed-up factor of original timing, 0 means as fast as possible. default 1")
+                        .hasArg(true).required(false)
+                        .build())
+                .addOption(Option.builder()
+                        .longOpt("session")
+                        .desc("replay queries of the same session (or user) sequentially in original order")
+                        .hasArg(false).required(false)
+                        .build())
+                .addOption(Option.builder()
+                        .longOpt("ingest")
+                        .desc("ingestion mode, table to insert rows into with executeBatch instead of running sqls")
+                        .hasArg(true).required(false)
+                        .build())
+                .addOption(Option.builder()
+                        .longOpt("schema")
+                        .desc("column spec of generated rows for ingestion, eg. id:bigint,name:string(16),price:decimal(10,2)")
+                        .hasArg(true).required(false)
+                        .build())
+                .addOption(Option.builder()
+                        .longOpt("data")
+                        .desc("csv files or folders with header to ingest instead of generated rows")
+                        .hasArg(true).required(false)
+                        .build())
+                .addOption(Option.builder()
+                        .longOpt("rows")
+                        .desc("total generated rows for ingestion. default 100000")
+                        .hasArg(true).required(false)
+                        .build())
+                .addOption(Option.builder()
+                        .longOpt("batch")
+                        .desc("rows per executeBatch for ingestion. default 1000")
+                        .hasArg(true).required(false)
+                        .build())
+                .addOption(Option.builder()
+                        .longOpt("commit")
+                        .desc("batches per commit for ingestion, 0 means auto commit. default 0")
+                        .hasArg(true).required(false)
+                        .build())
+                .addOption(Option.builder()
+                        .longOpt("statements")
+                        .desc("also output one metric per executed statement of multi-statement sql files")
+                        .hasArg(false).required(false)
+                        .build())
+                .addOption(Option.builder()
+                        .longOpt("sample")
+                        .desc("interval in ms of sampling connection pool, gc, heap and cpu of this tool, 0 means off. default 1000")
+                        .hasArg(true).required(false)
+                        .build())
+                .addOption(Option.builder()
+                        .longOpt("timeout")
+                        .desc("query timeout in seconds, sql will be cancelled if exceeds. default 0, no timeout")
+                        .hasArg(true).required(false)
+                        .build())
         ;
         CommandLineParser parser = new DefaultParser();
         HelpFormatter formatter = new HelpFormatter();
@@ -288,6 +498,42 @@ public class Main {
         if (cmd.hasOption("failure")) {
             config.failureRate = Double.parseDouble(cmd.getOptionValue("failure"));
         }
+        if (cmd.hasOption("replay")) {
+            config.replayLog = cmd.getOptionValue("replay");
+        }
+        if (cmd.hasOption("speed")) {
+            config.replaySpeed = Double.parseDouble(cmd.getOptionValue("speed"));
+        }
+        if (cmd.hasOption("session")) {
+            config.replaySession = true;
+        }
+        if (cmd.hasOption("ingest")) {
+            config.ingestTable = cmd.getOptionValue("ingest");
+        }
+        if (cmd.hasOption("schema")) {
+            config.ingestSchema = cmd.getOptionValue("schema");
+        }
+        if (cmd.hasOption("data")) {
+            config.ingestData = cmd.getOptionValue("data");
+        }
+        if (cmd.hasOption("rows")) {
+            config.ingestRows = Long.parseLong(cmd.getOptionValue("rows"));
+        }
+        if (cmd.hasOption("batch")) {
+            config.batchSize = Integer.parseInt(cmd.getOptionValue("batch"));
+        }
+        if (cmd.hasOption("commit")) {
+            config.commitInterval = Integer.parseInt(cmd.getOptionValue("commit"));
+        }
+        if (cmd.hasOption("statements")) {
+            config.statementMetrics = true;
+        }
+        if (cmd.hasOption("sample")) {
+            config.sampleInterval = Long.parseLong(cmd.getOptionValue("sample"));
+        }
+        if (cmd.hasOption("timeout")) {
+            config.timeout = Integer.parseInt(cmd.getOptionValue("timeout"));
+        }
 
         try {
             // validate config and print context
@@ -299,7 +545,11 @@ public class Main {
                 System.exit(1);
             }
             // multi thread run
-            main.run();
+            if (config.ingestTable != null) {
+                main.ingest();
+            } else {
+                main.run();
+            }
 
             System.exit(0);
         } catch (Throwable e) {
@@ -4,6 +4,9 @@ import lombok.Getter;
 import lombok.Setter;
 import org.apache.commons.lang3.StringUtils;
 
+import java.util.ArrayList;
+import java.util.List;
+
 public class Metric {
 
   @Getter
@@ -17,6 +20,9 @@ public class Metric {
   private String jobId = "anonymous";
   @Getter
   @Setter
+  private long connectionAcquireMs; // time waiting for a pooled connection
+  @Getter
+  @Setter
   private long clientStartMs;
   @Getter
   @Setter
@@ -60,6 +66,26 @@ public class Metric {
   @Getter
   @Setter
   private Long resultSize = -1L;
+  @Getter
+  @Setter
+  private ErrorClass errorClass = ErrorClass.NONE;
+  @Getter
+  @Setter
+  private String errorCode = "";
+  @Getter
+  @Setter
+  private long recordedDurationMs = -1L; // duration in replayed query log, -1 if unknown
+  @Getter
+  @Setter
+  private long scheduledMs; // arrival time scheduled by query log replay, 0 if not replayed
+  @Getter
+  @Setter
+  private long executionId; // shared by a sql file execution and its statements
+  @Getter
+  @Setter
+  private int statementIndex = -1; // -1 for the sql file, otherwise index of statement in it
+  @Getter
+  private List<Metric> statements; // per statement metrics, null if not collected
 
   @Getter
   private static final String header = StringUtils.join(new String[]{
@@ -68,12 +94,22 @@ public class Metric {
           "client_start_ms", "client_end_ms", "client_request_ms",
           "client_response_ms","gateway_start_ms","gateway_end_ms",
           "server_submit_ms","server_start_ms","server_plan_ms",
-          "server_dag_ms","server_resource_ms", "server_end_ms", "client_result_ms"
+          "server_dag_ms","server_resource_ms", "server_end_ms", "client_result_ms",
+          "error_class", "error_code", "recorded_duration_ms",
+          "execution_id", "statement_index", "connection_acquire_ms",
+          "scheduled_ms"
   }, ',');
 
   public Metric() {
   }
 
+  public void addStatement(Metric statement) {
+    if (statements == null) {
+      statements = new ArrayList<>();
+    }
+    statements.add(statement);
+  }
+
   public Long getClientDuration() {
     return clientEndMs - clientStartMs;
   }
@@ -82,11 +118,13 @@ public class Metric {
   public String toString() {
     long clientDuration = clientEndMs - clientStartMs;
     long serverDuration = serverEndMs - serverStartMs;
-    return String.format("%s,%s,%s,%d,%s,%d,%d,%d,%d,%d,%d,%d,%d,%d,%d,%d,%d,%d,%d,%d",
+    return String.format("%s,%s,%s,%d,%s,%d,%d,%d,%d,%d,%d,%d,%d,%d,%d,%d,%d,%d,%d,%d,%s,%s,%d,%d,%d,%d,%d",
             threadName, sqlId, isSuccess, resultSize,
             jobId, clientDuration, serverDuration,
             clientStartMs, clientEndMs, clientRequestMs, clientResponseMs, gatewayStartMs,
             gatewayEndMs, serverSubmitMs,serverStartMs, serverPlanMs, serverDagMs,
-            serverResourceMs, serverEndMs, clientResultMs);
+            serverResourceMs, serverEndMs, clientResultMs,
+            errorClass, StringUtils.replaceChars(errorCode, ",\r\n", "   "), recordedDurationMs,
+            executionId, statementIndex, connectionAcquireMs, scheduledMs);
   }
 }
@@ -0,0 +1,233 @@
+package com.clickzetta.jdbc_stress_tool;
+
+import com.fasterxml.jackson.core.JsonProcessingException;
+import com.fasterxml.jackson.databind.JsonNode;
+import com.fasterxml.jackson.databind.ObjectMapper;
+import lombok.Getter;
+import org.apache.commons.csv.CSVFormat;
+import org.apache.commons.csv.CSVParser;
+import org.apache.commons.csv.CSVRecord;
+import org.apache.commons.lang3.StringUtils;
+
+import java.io.BufferedReader;
+import java.io.Closeable;
+import java.io.IOException;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Paths;
+import java.time.Instant;
+import java.time.LocalDateTime;
+import java.time.OffsetDateTime;
+import java.time.ZoneId;
+import java.time.format.DateTimeParseException;
+import java.util.Iterator;
+import java.util.Map;
+import java.util.NoSuchElementException;
+
+/**
+ * Streaming reader of a production query log, one query per csv record or json line.
+ * Recognized fields: timestamp, sql, sql_id, user, session and duration_ms.
+ */
+public class QueryLog implements Iterator<QueryLog.Entry>, Closeable {
+
+    public static class Entry {
+        @Getter
+        private long index;
+        @Getter
+        private long timestampMs;
+        @Getter
+        private String sqlId;
+        @Getter
+        private String sql;
+        @Getter
+        private String session;
+        @Getter
+        private long recordedDurationMs = -1L;
+    }
+
+    private static final ObjectMapper MAPPER = new ObjectMapper();
+
+    private final Map<String, String> sqls;
+    private final BufferedReader jsonReader;
+    private final CSVParser csvParser;
+    private final Iterator<CSVRecord> csvRecords;
+    private long index = 0L;
+    private Entry next;
+
+    /**
+     * @param sqls sql files loaded by config, used to resolve entries carrying only a sql_id
+     */
+    public QueryLog(String path, Map<String, String> sqls) throws IOException {
+        this.sqls = sqls;
+        BufferedReader reader = Files.newBufferedReader(Paths.get(path), StandardCharsets.UTF_8);
+        if (path.endsWith(".jsonl") || path.endsWith(".json")) {
+            jsonReader = reader;
+            csvParser = null;
+            csvRecords = null;
+        } else {
+            jsonReader = null;
+            csvParser = CSVFormat.DEFAULT.withFirstRecordAsHeader().withIgnoreHeaderCase().withTrim().parse(reader);
+            csvRecords = csvParser.iterator();
+        }
+    }
+
+    @Override
+    public boolean hasNext() {
+        if (next == null) {
+            try {
+                next = readNext();
+            } catch (IOException e) {
+                throw new RuntimeException("failed to read query log, reason: " + e.getMessage(), e);
+            }
+        }
+        return next != null;
+    }
+
+    @Override
+    public Entry next() {
+        if (!hasNext()) {
+            throw new NoSuchElementException();
+        }
+        Entry entry = next;
+        next = null;
+        return entry;
+    }
+
+    @Override
+    public void close() throws IOException {
+        if (csvParser != null) {
+            csvParser.close();
+        }
+        if (jsonReader != null) {
+            jsonReader.close();
+        }
+    }
+
+    private Entry readNext() throws IOException {
+        if (csvRecords != null) {
+            while (true) {
+                CSVRecord record;
+                try {
+                    if (!csvRecords.hasNext()) {
+                        break;
+                    }
+                    record = csvRecords.next();
+                } catch (IllegalStateException e) {
+                    // csv parser can not resume after a broken record, eg. an unterminated quote
+                    System.err.println("skip rest of query log from entry " + index + ", invalid csv, reason: " +
+                            e.getMessage());
+                    break;
+                }
+                Entry entry = toEntry(field(record, "timestamp"), field(record, "sql"), field(record, "sql_id"),
+                        field(record, "user"), field(record, "session"), field(record, "duration_ms"));
+                if (entry != null) {
+                    return entry;
+                }
+            }
+            return null;
+        }
+        String line;
+        while ((line = jsonReader.readLine()) != null) {
+            if (StringUtils.isBlank(line)) {
+                continue;
+            }
+            JsonNode node;
+            try {
+                node = MAPPER.readTree(line);
+            } catch (JsonProcessingException e) {
+                System.err.println("skip query log entry " + index++ + ", invalid json");
+                continue;
+            }
+            Entry entry = toEntry(field(node, "timestamp"), field(node, "sql"), field(node, "sql_id"),
+                    field(node, "user"), field(node, "session"), field(node, "duration_ms"));
+            if (entry != null) {
+                return entry;
+            }
+        }
+        return null;
+    }
+
+    private Entry toEntry(String timestamp, String sql, String sqlId, String user, String session,
+                          String duration) {
+        long i = index++;
+        if (StringUtils.isEmpty(sql)) {
+            sql = resolve(sqlId);
+            if (sql == null) {
+                System.err.println("skip query log entry " + i + ", unknown sql_id '" + sqlId + "'");
+                return null;
+            }
+        } else if (StringUtils.isEmpty(sqlId)) {
+            sqlId = "sql_" + Integer.toHexString(sql.trim().hashCode());
+        }
+        if (StringUtils.isEmpty(timestamp)) {
+            System.err.println("skip query log entry " + i + ", no timestamp");
+            return null;
+        }
+        Entry entry = new Entry();
+        entry.index = i;
+        try {
+            entry.timestampMs = parseTimestamp(timestamp);
+        } catch (DateTimeParseException e) {
+            System.err.println("skip query log entry " + i + ", invalid timestamp '" + timestamp + "'");
+            return null;
+        }
+        entry.sqlId = sqlId;
+        entry.sql = sql;
+        // queries of the same session, or the same user if session is unknown, are replayed in order
+        entry.session = StringUtils.isNotEmpty(session) ? session : user;
+        if (StringUtils.isNotEmpty(duration)) {
+            try {
+                entry.recordedDurationMs = (long) Double.parseDouble(duration);
+            } catch (NumberFormatException e) {
+                System.err.println("skip query log entry " + i + ", invalid duration_ms '" + duration + "'");
+                return null;
+            }
+        }
+        return entry;
+    }
+
+    private String resolve(String sqlId) {
+        if (StringUtils.isEmpty(sqlId)) {
+            return null;
+        }
+        String sql = sqls.get(sqlId);
+        if (sql == null) {
+            sql = sqls.get(sqlId + ".sql");
+        }
+        return sql;
+    }
+
+    /**
+     * epoch seconds or milliseconds, or ISO-8601 date time in local time zone if no offset given
+     */
+    static long parseTimestamp(String value) {
+        try {
+            double epoch = Double.parseDouble(value);
+            return epoch < 1e11 ? (long) (epoch * 1000) : (long) epoch;
+        } catch (NumberFormatException e) {
+            // not a number
+        }
+        // accept "2024-01-01 12:00:00" as well as "2024-01-01T12:00:00"
+        String isoValue = value.trim().replaceFirst(" ", "T");
+        try {
+            return Instant.parse(isoValue).toEpochMilli();
+        } catch (DateTimeParseException e) {
+            // no zone
+        }
+        try {
+            return OffsetDateTime.parse(isoValue).toInstant().toEpochMilli();
+        } catch (DateTimeParseException e) {
+            // no offset
+        }
+        return LocalDateTime.parse(isoValue).atZone(ZoneId.systemDefault()).toInstant().toEpochMilli();
+    }
+
+    private static String field(CSVRecord record, String name) {
+        return record.isMapped(name) && record.isSet(name) ? record.get(name) : null;
+    }
+
+    private static String field(JsonNode node, String name) {
+        JsonNode value = node.get(name);
+        return value == null || value.isNull() ? null : value.asText();
+    }
+}
@@ -0,0 +1,108 @@
+package com.clickzetta.jdbc_stress_tool;
+
+import lombok.Getter;
+
+import java.util.concurrent.Callable;
+import java.util.concurrent.CompletableFuture;
+import java.util.concurrent.CompletionService;
+import java.util.concurrent.ConcurrentHashMap;
+import java.util.concurrent.Semaphore;
+import java.util.concurrent.atomic.AtomicLong;
+
+/**
+ * Submits queries of a query log to the completion service in background, either at original
+ * inter-arrival times scaled by speed (speed 0 means no waiting), and optionally keeping queries of
+ * one session strictly sequential.
+ */
+public class QueryLogReplayer extends Thread {
+
+    private final Config config;
+    private final SqlRunner prototype;
+    private final CompletionService<Metric> completionService;
+    // bounds queries read from log but not finished yet, so that log is never loaded as a whole
+    private final Semaphore pending;
+    // last query of each session still running or waiting, used to chain the next query of the session
+    private final ConcurrentHashMap<String, CompletableFuture<Void>> sessions = new ConcurrentHashMap<>();
+    private final AtomicLong submitted = new AtomicLong(0L);
+    private volatile boolean done = false;
+    @Getter
+    private volatile Throwable error;
+
+    public QueryLogReplayer(Config config, SqlRunner prototype, CompletionService<Metric> completionService) {
+        super("query-log-replayer");
+        setDaemon(true);
+        this.config = config;
+        this.prototype = prototype;
+        this.completionService = completionService;
+        this.pending = new Semaphore(Math.max(1000, config.threadCount * 10));
+    }
+
+    public long getSubmitted() {
+        return submitted.get();
+    }
+
+    public boolean isDone() {
+        return done;
+    }
+
+    @Override
+    public void run() {
+        try (QueryLog log = new QueryLog(config.replayLog, config.sqls)) {
+            long firstTimestampMs = -1L;
+            long startMs = System.currentTimeMillis();
+            while (log.hasNext()) {
+                QueryLog.Entry entry = log.next();
+                if (firstTimestampMs < 0) {
+                    firstTimestampMs = entry.getTimestampMs();
+                }
+                long due = System.currentTimeMillis();
+                if (config.replaySpeed > 0) {
+                    due = startMs + (long) ((entry.getTimestampMs() - firstTimestampMs) / config.replaySpeed);
+                    long wait = due - System.currentTimeMillis();
+                    if (wait > 0) {
+                        Thread.sleep(wait);
+                    }
+                }
+                pending.acquire();
+                submit(entry, due);
+            }
+        } catch (Throwable e) {
+            error = e;
+            System.err.println("failed to replay query log, reason: " + e.getMessage());
+        } finally {
+            done = true;
+        }
+    }
+
+    /**
+     * @param due scheduled arrival time, queueing behind busy workers shows up as client_start_ms - scheduled_ms
+     */
+    private void submit(QueryLog.Entry entry, long due) {
+        SqlRunner runner = prototype.clone(entry.getSqlId(), entry.getSql(), config.prefix);
+        CompletableFuture<Void> finished = new CompletableFuture<>();
+        Callable<Metric> task = () -> {
+            try {
+                Metric metric = runner.call();
+                metric.setRecordedDurationMs(entry.getRecordedDurationMs());
+                metric.setScheduledMs(due);
+                return metric;
+            } finally {
+                pending.release();
+                finished.complete(null);
+            }
+        };
+        submitted.incrementAndGet();
+        String session = entry.getSession();
+        if (!config.replaySession || session == null) {
+            completionService.submit(task);
+            return;
+        }
+        CompletableFuture<Void> previous = sessions.put(session, finished);
+        if (previous == null) {
+            completionService.submit(task);
+        } else {
+            previous.thenRun(() -> completionService.submit(task));
+        }
+        finished.thenRun(() -> sessions.remove(session, finished));
+    }
+}
@@ -0,0 +1,35 @@
+package com.clickzetta.jdbc_stress_tool;
+
+import java.io.Closeable;
+import java.io.IOException;
+import java.nio.charset.StandardCharsets;
+import java.util.List;
+
+/**
+ * Rows to ingest, shared by all writer threads.
+ */
+public interface RowSource extends Closeable {
+
+    List<String> getColumns();
+
+    /**
+     * @return next row, or null if no rows left
+     */
+    Object[] next() throws IOException;
+
+    /**
+     * approximate payload size of a value sent to server
+     */
+    static long sizeOf(Object value) {
+        if (value == null) {
+            return 0L;
+        } else if (value instanceof String) {
+            return ((String) value).getBytes(StandardCharsets.UTF_8).length;
+        } else if (value instanceof Boolean) {
+            return 1L;
+        } else if (value instanceof Integer || value instanceof java.sql.Date) {
+            return 4L;
+        }
+        return 8L;
+    }
+}
@@ -7,26 +7,63 @@ import java.sql.Connection;
 import java.sql.ResultSet;
 import java.sql.SQLException;
 import java.sql.Statement;
+import java.util.ArrayList;
+import java.util.List;
 import java.util.concurrent.Callable;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.ScheduledFuture;
+import java.util.concurrent.ScheduledThreadPoolExecutor;
+import java.util.concurrent.TimeUnit;
+import java.util.concurrent.atomic.AtomicBoolean;
+import java.util.concurrent.atomic.AtomicLong;
 
 public class SqlRunner implements Callable<Metric> {
+    // times statements running longer than timeout, for drivers ignoring setQueryTimeout
+    private static final ScheduledThreadPoolExecutor CANCELLER = new ScheduledThreadPoolExecutor(1, r -> {
+        Thread t = new Thread(r, "sql-canceller");
+        t.setDaemon(true);
+        return t;
+    });
+    // runs the blocking cancel calls, so that a cancel stuck on a hung server never delays other timeouts
+    private static final ExecutorService CANCEL_EXECUTOR = Executors.newCachedThreadPool(r -> {
+        Thread t = new Thread(r, "sql-cancel");
+        t.setDaemon(true);
+        return t;
+    });
+
+    static {
+        // drop watchdogs of finished sqls at once instead of holding their statements until timeout
+        CANCELLER.setRemoveOnCancelPolicy(true);
+    }
+    private static final AtomicLong EXECUTION_ID = new AtomicLong(0L);
+
     String sqlId;
     String sql;
     String jobIdPrefix;
     String threadName = "";
+    int timeout; // in seconds, 0 means no timeout
+    boolean statementMetrics; // emit one child metric per statement of multi-statement sqls
     DataSource ds;
     CompositeDataSource cds;
 
-    public SqlRunner(CompositeDataSource cds, String sqlId, String sql, String prefix) {
+    public SqlRunner(CompositeDataSource cds, String sqlId, String sql, String prefix, int timeout,
+                     boolean statementMetrics) {
         this.cds = cds;
         this.ds = cds.getDataSource();
         this.sqlId = sqlId;
         this.sql = sql;
         this.jobIdPrefix = prefix;
+        this.timeout = timeout;
+        this.statementMetrics = statementMetrics;
     }
 
     public SqlRunner clone(String _sqlId, String _sql, String _prefix) {
-        return new SqlRunner(cds, _sqlId, _sql, _prefix);
+        return new SqlRunner(cds, _sqlId, _sql, _prefix, timeout, statementMetrics);
+    }
+
+    static long nextExecutionId() {
+        return EXECUTION_ID.incrementAndGet();
     }
 
     @Override
@@ -36,9 +73,16 @@ public class SqlRunner implements Callable<Metric> {
         metric.setThreadName(threadName);
         metric.setSqlId(sqlId);
         metric.setJobId(sqlId);
-        Connection connection = ds.getConnection();
+        metric.setExecutionId(nextExecutionId());
+        long acquireStartMs = System.currentTimeMillis();
+        Connection connection = null;
+        ScheduledFuture<?> watchdog = null;
+        AtomicBoolean cancelled = new AtomicBoolean(false);
         try {
+            connection = ds.getConnection();
+            metric.setConnectionAcquireMs(System.currentTimeMillis() - acquireStartMs);
             Statement statement = connection.createStatement();
+            watchdog = scheduleCancel(statement, cancelled);
 
             long startTime = System.currentTimeMillis();
             metric.setClientStartMs(startTime);
@@ -47,17 +91,22 @@ public class SqlRunner implements Callable<Metric> {
 
             long resultSize = 0L;
             boolean hasResult;
-            for (String q : SqlUtils.splitSql(sql)) {
-                if (StringUtils.isNotEmpty(q.trim())) {
-                    hasResult = statement.execute(q);
-                    metric.setClientResultMs(System.currentTimeMillis());
-                    if (hasResult) {
-                        ResultSet rs = statement.getResultSet();
-                        while (rs.next()) {
-                            resultSize++;
-                        }
+            List<String> statements = splitStatements(sql);
+            boolean children = statementMetrics && statements.size() > 1;
+            int index = 0;
+            for (String q : statements) {
+                Metric child = startStatement(metric, index++, children);
+                hasResult = statement.execute(q);
+                metric.setClientResultMs(System.currentTimeMillis());
+                long rows = 0L;
+                if (hasResult) {
+                    ResultSet rs = statement.getResultSet();
+                    while (rs.next()) {
+                        rows++;
                     }
                 }
+                resultSize += rows;
+                endStatement(child, rows, metric.getClientResultMs());
             }
 
             long endTime = System.currentTimeMillis();
@@ -66,16 +115,114 @@ public class SqlRunner implements Callable<Metric> {
             metric.setClientEndMs(endTime);
             metric.setServerEndMs(endTime);
         } catch (Throwable e) {
-            long endTime = System.currentTimeMillis();
-            metric.setClientEndMs(endTime);
-            metric.setServerEndMs(endTime);
-            System.err.println("failed to run sql " + sqlId + ", reason: " + e.getMessage());
+            fail(metric, e, acquireStartMs, connection != null, cancelled.get());
         } finally {
+            if (watchdog != null) {
+                watchdog.cancel(false);
+            }
             close(connection);
         }
         return metric;
     }
 
+    ScheduledFuture<?> scheduleCancel(Statement statement, AtomicBoolean cancelled) {
+        if (timeout <= 0) {
+            return null;
+        }
+        try {
+            statement.setQueryTimeout(timeout);
+        } catch (SQLException e) {
+            // not supported by driver, rely on watchdog only
+        }
+        return CANCELLER.schedule(() -> {
+            cancelled.set(true);
+            CANCEL_EXECUTOR.execute(() -> {
+                try {
+                    statement.cancel();
+                } catch (Throwable e) {
+                    System.err.println("failed to cancel sql '" + sqlId + "', reason: " + e.getMessage());
+                }
+            });
+        }, timeout, TimeUnit.SECONDS);
+    }
+
+    /**
+     * @return non-empty statements of sql
+     */
+    static List<String> splitStatements(String sql) {
+        List<String> statements = new ArrayList<>();
+        for (String q : SqlUtils.splitSql(sql)) {
+            if (StringUtils.isNotEmpty(q.trim())) {
+                statements.add(q);
+            }
+        }
+        return statements;
+    }
+
+    /**
+     * @param children whether to collect child metrics, only for multi-statement sqls with statement metrics on
+     * @return metric of the statement at index, or null if children are not collected
+     */
+    Metric startStatement(Metric parent, int index, boolean children) {
+        if (!children) {
+            return null;
+        }
+        Metric child = new Metric();
+        child.setThreadName(threadName);
+        child.setSqlId(sqlId);
+        child.setJobId(sqlId);
+        child.setExecutionId(parent.getExecutionId());
+        child.setStatementIndex(index);
+        long startTime = System.currentTimeMillis();
+        child.setClientStartMs(startTime);
+        child.setServerSubmitMs(startTime);
+        child.setServerStartMs(startTime);
+        parent.addStatement(child);
+        return child;
+    }
+
+    void endStatement(Metric child, long resultSize, long resultMs) {
+        if (child == null) {
+            return;
+        }
+        long endTime = System.currentTimeMillis();
+        child.setClientResultMs(resultMs);
+        child.setClientEndMs(endTime);
+        child.setServerEndMs(endTime);
+        child.setResultSize(resultSize);
+        child.setSuccess(true);
+    }
+
+    void fail(Metric metric, Throwable e, long acquireStartMs, boolean connected, boolean cancelled) {
+        long endTime = System.currentTimeMillis();
+        if (!connected) { // still waiting for a pooled connection when failed
+            metric.setConnectionAcquireMs(endTime - acquireStartMs);
+        }
+        if (metric.getClientStartMs() == 0L) { // failed before sql was sent, eg. pool exhausted
+            metric.setClientStartMs(acquireStartMs);
+        }
+        if (metric.getServerStartMs() == 0L) {
+            metric.setServerSubmitMs(metric.getClientStartMs());
+            metric.setServerStartMs(metric.getClientStartMs());
+        }
+        metric.setClientEndMs(endTime);
+        metric.setServerEndMs(endTime);
+        metric.setSuccess(false);
+        metric.setErrorClass(ErrorClass.classify(e, connected, cancelled));
+        metric.setErrorCode(ErrorClass.codeOf(e));
+        if (metric.getStatements() != null) {
+            Metric child = metric.getStatements().get(metric.getStatements().size() - 1);
+            if (child.getClientEndMs() == 0L) { // the failed statement
+                child.setClientEndMs(endTime);
+                child.setServerEndMs(endTime);
+                child.setErrorClass(metric.getErrorClass());
+                child.setErrorCode(metric.getErrorCode());
+            }
+        }
+        System.err.println("failed to run sql '" + sqlId + "', " + metric.getErrorClass() +
+                " (" + metric.getErrorCode() + "), reason: " + e.getMessage());
+    }
+
     private static void close(Connection connection) {
         if (connection != null) {
             try {
@@ -0,0 +1,230 @@
+import os
+import numpy as np
+import pandas as pd
+import streamlit as st
+import altair as alt
+
+def percentile(n):
+    def percentile_(x):
+        return np.percentile(x, n)
+    percentile_.__name__ = 'P{}'.format(n)
+    return percentile_
+
+def show_ingestion_report(df):
+    duration = max(df['client_end_ms'].max() - df['client_start_ms'].min(), 1)
+    df_ok = df[df['is_success'] == True]
+    rows = df_ok['batch_rows'].sum()
+    mb = df_ok['batch_bytes'].sum() / 1024 / 1024
+    st.code('batch count {:,} \t failed {:,} \t rows {:,} \t time elapsed {:,} ms \t rows/s {:.1f} \t MB/s {:.3f}'.format(
+        len(df), len(df) - len(df_ok), rows, duration, 1000.0 * rows / duration, 1000.0 * mb / duration))
+    step = duration // 300
+    step = step if step >= 1000 else 1000
+
+    # throughput chart
+    st.markdown('#### Ingestion Throughput Chart')
+    df_tp = df_ok[['client_end_ms', 'batch_rows', 'batch_bytes']].copy()
+    df_tp['time'] = (df_tp['client_end_ms'] - df['client_start_ms'].min()) // step * step / 1000
+    df_tp = df_tp.groupby('time').agg({'batch_rows': 'sum', 'batch_bytes': 'sum'})
+    df_tp['rows/s'] = df_tp['batch_rows'] * 1000 / step
+    df_tp['MB/s'] = df_tp['batch_bytes'] * 1000 / step / 1024 / 1024
+    df_tp = df_tp.reset_index()
+    base = alt.Chart(df_tp).encode(x=alt.X('time', title='time(s)'))
+    c = alt.layer(
+        base.mark_line(point=True).encode(y=alt.Y('rows/s')),
+        base.mark_line(point=True, color='orange').encode(y=alt.Y('MB/s'))
+    ).resolve_scale(y='independent').interactive()
+    st.altair_chart(c, use_container_width=True)
+
+    # batch latency chart
+    st.markdown('#### Batch Latency Chart: batch_duration_ms')
+    df_lat = df_ok[['client_end_ms', 'batch_duration_ms']].copy()
+    df_lat['time'] = (df_lat['client_end_ms'] - df['client_start_ms'].min()) // step * step / 1000
+    df_lat = df_lat.groupby('time')['batch_duration_ms'].agg([percentile(50), percentile(95), percentile(99)])
+    df_lat = df_lat.reset_index().melt('time', var_name='percentile', value_name='duration(ms)')
+    c = alt.Chart(df_lat).mark_line(point=True).encode(
+        x=alt.X('time', title='time(s)'),
+        y=alt.Y('duration(ms)'),
+        color='percentile'
+    ).interactive()
+    st.altair_chart(c, use_container_width=True)
+
+    # profile dataframe
+    st.markdown('#### Batch Profile Table')
+    stats = df_ok[['batch_rows', 'batch_bytes', 'batch_duration_ms', 'commit_ms']].describe(
+        percentiles=[0.5, 0.9, 0.95, 0.99]).T.reset_index().rename(columns={'index': 'metric'})
+    st.dataframe(stats, use_container_width=True, hide_index=True)
+
+PHASES = ['queue_ms', 'plan_ms', 'dag_ms', 'resource_ms', 'execution_ms', 'gateway_ms', 'network_ms', 'sdk_ms']
+
+def add_phase_columns(df):
+    # phases sum up to client_duration_ms, a missing server phase timestamp makes that phase 0
+    plan = df['server_plan_ms'].where(df['server_plan_ms'] > 0, df['server_start_ms'])
+    dag = df['server_dag_ms'].where(df['server_dag_ms'] > 0, plan)
+    resource = df['server_resource_ms'].where(df['server_resource_ms'] > 0, dag)
+    df['queue_ms'] = df['server_start_ms'] - df['server_submit_ms']
+    df['plan_ms'] = plan - df['server_start_ms']
+    df['dag_ms'] = dag - plan
+    df['resource_ms'] = resource - dag
+    df['execution_ms'] = df['server_end_ms'] - resource
+    df['gateway_ms'] = df['gateway_end_ms'] - df['gateway_start_ms'] - (df['server_end_ms'] - df['server_submit_ms'])
+    df['network_ms'] = df['client_response_ms'] - df['client_request_ms'] - (df['gateway_end_ms'] - df['gateway_start_ms'])
+    df['sdk_ms'] = df['client_duration_ms'] - (df['client_response_ms'] - df['client_request_ms'])
+    # clock skew between client, gateway and server may give small negative values
+    df[PHASES] = df[PHASES].clip(lower=0)
+
+def show_phase_breakdown(df, step):
+    # only successful single-job sqls carry job profiling from clickzetta
+    df_phase = df[(df['is_success'] == True) & (df['gateway_start_ms'] > 0)]
+    if df_phase.empty:
+        return
+    cols = st.columns([4,1], vertical_alignment='bottom')
+    cols[0].markdown('#### Latency Phase Breakdown')
+    stat = cols[1].selectbox('select phase statistic', ['P50', 'P90', 'P95', 'P99', 'mean'], index=2)
+    agg = 'mean' if stat == 'mean' else percentile(int(stat[1:]))
+
+    df_stack = df_phase.groupby('sql_id')[PHASES].agg(agg).reset_index()
+    df_stack = df_stack.melt('sql_id', var_name='phase', value_name='duration(ms)')
+    df_stack['order'] = df_stack['phase'].map(PHASES.index)
+    c = alt.Chart(df_stack).mark_bar().encode(
+        x=alt.X('duration(ms)', title=f'{stat} duration(ms) of each phase'),
+        y=alt.Y('sql_id'),
+        color=alt.Color('phase', sort=PHASES),
+        order=alt.Order('order'),
+        detail=['phase', 'duration(ms)']
+    ).interactive()
+    st.altair_chart(c, use_container_width=True)
+
+    df_series = df_phase[['n_client_end_ms'] + PHASES].copy()
+    df_series['time'] = df_series['n_client_end_ms'] // step * step
+    df_series = df_series.groupby('time')[PHASES].agg(agg).reset_index()
+    df_series = df_series.melt('time', var_name='phase', value_name='duration(ms)')
+    df_series['order'] = df_series['phase'].map(PHASES.index)
+    c = alt.Chart(df_series).mark_area().encode(
+        x=alt.X('time', title='time(ms)'),
+        y=alt.Y('duration(ms)', stack='zero', title=f'{stat} duration(ms)'),
+        color=alt.Color('phase', sort=PHASES),
+        order=alt.Order('order'),
+        detail=['phase', 'duration(ms)']
+    ).interactive()
+    st.altair_chart(c, use_container_width=True)
+
+def split_statements(df):
+    # per statement rows share execution_id with their sql file row, which has statement_index -1
+    if 'statement_index' not in df.columns:
+        return df, None
+    df_statements = df[df['statement_index'] >= 0].reset_index(drop=True)
+    df = df[df['statement_index'] < 0].reset_index(drop=True)
+    return df, df_statements if not df_statements.empty else None
+
+def show_statement_drilldown(df, df_statements, duration_col):
+    if df_statements is None:
+        return
+    st.markdown(f'#### Statement Drill-down: {duration_col}')
+    p95 = df[df['sql_id'].isin(df_statements['sql_id'])].groupby('sql_id')[duration_col].quantile(0.95)
+    sql_ids = p95.sort_values(ascending=False).index.tolist()
+    sql_id = st.selectbox('select sql file, slowest P95 first', sql_ids)
+    df_sql = df_statements[df_statements['sql_id'] == sql_id]
+
+    stats = df_sql.groupby('statement_index')[duration_col].agg(
+        ['count', 'mean', percentile(50), percentile(95), percentile(99), 'max'])
+    stats['success_rate'] = df_sql.groupby('statement_index')['is_success'].mean().apply(lambda x: round(x * 100, 2))
+    stats['avg_rows'] = df_sql.groupby('statement_index')['result_size'].mean()
+    file_mean = df[df['sql_id'] == sql_id][duration_col].mean()
+    stats['share(%)'] = (100.0 * stats['mean'] / file_mean).round(2) if file_mean else np.nan
+    stats = stats.reset_index()
+    slowest = stats.loc[stats['P95'].idxmax(), 'statement_index']
+    st.markdown(f'slowest statement of `{sql_id}` is **#{slowest}** by P95')
+    st.dataframe(stats, use_container_width=True, hide_index=True)
+
+    c = alt.Chart(stats).mark_bar().encode(
+        x=alt.X('P95', title=f'P95 {duration_col}'),
+        y=alt.Y('statement_index:O', title='statement index'),
+        color=alt.condition(alt.datum.statement_index == slowest, alt.value('orange'), alt.value('steelblue')),
+        detail=['count', 'mean', 'P50', 'P99', 'max']
+    )
+    st.altair_chart(c, use_container_width=True)
+
+    st.markdown(f'Slowest executions of statement #{slowest}')
+    df_slow = df_sql[df_sql['statement_index'] == slowest].nlargest(10, duration_col)
+    st.dataframe(df_slow[['execution_id', 'thread_name', 'job_id', 'is_success', 'result_size',
+                          'client_duration_ms', 'server_duration_ms']],
+                 use_container_width=True, hide_index=True)
+
+CLIENT_METRICS = ['pool_active', 'pool_idle', 'pool_pending', 'gc_pause_ms', 'heap_used_mb', 'process_cpu', 'thread_count']
+
+def load_client_samples(csv, start_ms):
+    # written by the tool next to data.csv, see ClientSampler
+    client_csv = f'{csv[:-4]}_client.csv'
+    if not os.path.exists(client_csv):
+        return None
+    try:
+        df_client = pd.read_csv(client_csv)
+    except Exception as ex:
+        st.warning(f'Failed to read {client_csv}, reason {ex}')
+        return None
+    df_client['time'] = (df_client['timestamp_ms'] - start_ms) / 1000
+    return df_client
+
+def overlay_client_samples(chart, df_client):
+    if df_client is None or df_client.empty:
+        return chart
+    metric = st.selectbox('overlay client metric', ['none'] + CLIENT_METRICS,
+                          help='sampled from the load generator: connection pool, gc, heap and cpu')
+    if metric == 'none':
+        return chart
+    c = alt.Chart(df_client).mark_line(color='orange', strokeDash=[4, 2]).encode(
+        x=alt.X('time', title='time(s)'),
+        y=alt.Y(metric, axis=alt.Axis(titleColor='orange'))
+    )
+    return alt.layer(chart, c).resolve_scale(y='independent')
+
+def show_connection_acquire(df, step):
+    if 'connection_acquire_ms' not in df.columns:
+        return
+    st.markdown('#### Connection Acquire Chart: connection_acquire_ms')
+    df_acquire = df[['n_client_start_ms', 'connection_acquire_ms']].copy()
+    df_acquire['time'] = df_acquire['n_client_start_ms'] // step * step
+    df_acquire = df_acquire.groupby('time')['connection_acquire_ms'].agg(['mean', percentile(95), 'max'])
+    df_acquire = df_acquire.reset_index().melt('time', var_name='statistic', value_name='duration(ms)')
+    c = alt.Chart(df_acquire).mark_line(point=True).encode(
+        x=alt.X('time', title='time(ms)'),
+        y=alt.Y('duration(ms)'),
+        color='statistic'
+    ).interactive()
+    st.altair_chart(c, use_container_width=True)
+
+HEATMAP_TIME_BINS = 100
+HEATMAP_LATENCY_BINS = 40
+
+def show_latency_heatmap(df, duration_col):
+    cols = st.columns([4,1], vertical_alignment='bottom')
+    cols[0].markdown(f'#### Latency Heatmap: {duration_col}')
+    sql_ids = cols[1].multiselect('filter sql_id', sorted(df['sql_id'].unique()), placeholder='all sql_id')
+    mask = df['sql_id'].isin(sql_ids).to_numpy() if sql_ids else slice(None)
+    t = df['n_client_end_ms'].to_numpy()[mask]
+    d = df[duration_col].to_numpy()[mask]
+    if len(t) == 0:
+        return
+    # log-scaled latency buckets, durations below 1ms share the lowest bucket
+    d = np.clip(d, 1, None)
+    y_edges = np.logspace(0, np.log10(max(d.max(), 2)), HEATMAP_LATENCY_BINS + 1)
+    x_edges = np.linspace(0, max(t.max(), 1), HEATMAP_TIME_BINS + 1)
+    counts, _, _ = np.histogram2d(t, d, bins=[x_edges, y_edges])
+    # only non-empty cells are sent to the browser, at most time bins * latency bins
+    xi, yi = np.nonzero(counts)
+    df_heat = pd.DataFrame({
+        'time': x_edges[xi] / 1000,
+        'time_end': x_edges[xi + 1] / 1000,
+        'latency': y_edges[yi],
+        'latency_end': y_edges[yi + 1],
+        'count': counts[xi, yi].astype(np.int64),
+    })
+    c = alt.Chart(df_heat).mark_rect().encode(
+        x=alt.X('time', title='time(s)'),
+        x2='time_end',
+        y=alt.Y('latency', title='duration(ms)', scale=alt.Scale(type='log')),
+        y2='latency_end',
+        color=alt.Color('count', scale=alt.Scale(type='log', scheme='viridis')),
+        detail=['count', 'latency', 'latency_end']
+    ).interactive()
+    st.altair_chart(c, use_container_width=True)
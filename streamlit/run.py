@@ -12,6 +12,9 @@ from contextlib import contextmanager, redirect_stdout
 import streamlit as st
 from streamlit.runtime.scriptrunner import add_script_run_ctx
 import altair as alt
+from report import show_ingestion_report, add_phase_columns, show_phase_breakdown, \
+    split_statements, show_statement_drilldown, load_client_samples, overlay_client_samples, \
+    show_connection_acquire, show_latency_heatmap
 import glob
 from zipfile import ZipFile, is_zipfile
 
@@ -34,14 +37,14 @@ col_conf_and_run, col_load_and_log = st.columns(2)
 
 if 'VOLUME' in os.environ: # for docker
     vol = os.environ['VOLUME']
-    for path in ['conf', 'sql', 'jdbc_jar', 'data', 'download']:
+    for path in ['conf', 'sql', 'replay', 'ingest', 'jdbc_jar', 'data', 'download']:
         src = os.path.join(vol, path)
         if not os.path.exists(src):
             os.mkdir(src)
         if not os.path.exists(path):
             os.symlink(src, path)
 else:
-    for path in ['conf', 'sql', 'jdbc_jar', 'data', 'download']:
+    for path in ['conf', 'sql', 'replay', 'ingest', 'jdbc_jar', 'data', 'download']:
         if not os.path.exists(path):
             os.mkdir(path)
 
@@ -156,6 +159,30 @@ def upload_conf_dialog():
         save_file(staged, dest)
         st.rerun()
 
+@st.dialog("Upload query log")
+def upload_replay_dialog():
+    dest = 'replay'
+    st.markdown(f'To folder `{dest}/`')
+    st.markdown('csv with header or jsonl, fields: `timestamp`, `sql` or `sql_id`, optional `user`, `session`, `duration_ms`')
+    staged = st.file_uploader(f'To folder {dest}', accept_multiple_files=False, label_visibility='collapsed')
+    if st.button('OK', use_container_width=True):
+        if not os.path.exists(dest):
+            os.mkdir(dest)
+        save_file(staged, dest)
+        st.rerun()
+
+@st.dialog("Upload ingestion data")
+def upload_ingest_dialog():
+    dest = 'ingest'
+    st.markdown(f'To folder `{dest}/`')
+    st.markdown('csv files with header, header names are used as column names')
+    staged = st.file_uploader(f'To folder {dest}', accept_multiple_files=True, label_visibility='collapsed')
+    if st.button('OK', use_container_width=True):
+        if not os.path.exists(dest):
+            os.mkdir(dest)
+        save_files(staged, dest)
+        st.rerun()
+
 @st.dialog("Upload jar file")
 def upload_jar_dialog():
     dest = 'jdbc_jar'
@@ -191,6 +218,53 @@ with col_conf_and_run:
     load_value('jdbc_thread')
     thread = cols[1].number_input('JDBC Concurrency', value=20, min_value=1, step=1,
                                   key='_jdbc_thread', on_change=store_value, args=['jdbc_thread'])
+    with st.expander('Replay query log instead (optional)'):
+        cols = st.columns([1,3])
+        with cols[0]:
+            if st.button('New query log', use_container_width=True):
+                upload_replay_dialog()
+        load_value('selected_replay')
+        replay_log = cols[1].selectbox('Select query log', list_files('replay'), index=None,
+                                       key='_selected_replay', on_change=store_value, args=['selected_replay'],
+                                       placeholder='Pick query log here', label_visibility='collapsed',
+                                       help='sql_id in query log is resolved from selected SQL files, repeat times is ignored')
+        cols = st.columns(2)
+        load_value('replay_speed')
+        replay_speed = cols[0].number_input('Replay speed', value=1.0, min_value=0.0, step=0.5,
+                                            help='1 replays original inter-arrival times, 2 replays twice as fast, 0 as fast as possible',
+                                            key='_replay_speed', on_change=store_value, args=['replay_speed'])
+        load_value('replay_session')
+        replay_session = cols[1].checkbox('Keep session order',
+                                          help='queries of the same session (or user) run one after another in original order',
+                                          key='_replay_session', on_change=store_value, args=['replay_session'])
+    with st.expander('Ingest rows instead (optional)'):
+        load_value('ingest_table')
+        ingest_table = st.text_input('Target table', placeholder='rows are inserted with executeBatch if specified',
+                                     key='_ingest_table', on_change=store_value, args=['ingest_table'])
+        load_value('ingest_schema')
+        ingest_schema = st.text_input('Schema of generated rows',
+                                      placeholder='id:bigint,name:string(16),price:decimal(10,2),ts:timestamp',
+                                      help='types: int, bigint, double, decimal(p,s), string(n), boolean, date, timestamp',
+                                      key='_ingest_schema', on_change=store_value, args=['ingest_schema'])
+        cols = st.columns([1,3])
+        with cols[0]:
+            if st.button('New data files', use_container_width=True):
+                upload_ingest_dialog()
+        load_value('selected_ingest')
+        ingest_data = cols[1].multiselect('Select csv files', list_files('ingest', recursive=True),
+                                          key='_selected_ingest', on_change=store_value, args=['selected_ingest'],
+                                          placeholder='Or pick csv files to ingest here', label_visibility='collapsed')
+        cols = st.columns(3)
+        load_value('ingest_rows')
+        ingest_rows = cols[0].number_input('Generated rows', value=100000, min_value=1, step=10000,
+                                           key='_ingest_rows', on_change=store_value, args=['ingest_rows'])
+        load_value('ingest_batch')
+        ingest_batch = cols[1].number_input('Batch size', value=1000, min_value=1, step=100,
+                                            key='_ingest_batch', on_change=store_value, args=['ingest_batch'])
+        load_value('ingest_commit')
+        ingest_commit = cols[2].number_input('Batches per commit', value=0, min_value=0, step=1,
+                                             help='0 means auto commit',
+                                             key='_ingest_commit', on_change=store_value, args=['ingest_commit'])
     st.subheader('2. Define target: config and driver')
     cols = st.columns([1,3])
     with cols[0]:
@@ -225,6 +299,10 @@ with col_conf_and_run:
     no_default_jdbc = cols[0].checkbox('Ignore built-in clickzetta-java',
                                        help='do no include built-in clickzetta-java in classpath, in case you want to test with a version under development',
                                        key='_ignore_builtin_jdbc', on_change=store_value, args=['ignore_builtin_jdbc'])
+    load_value('statement_metrics')
+    statement_metrics = cols[0].checkbox('Per statement metrics',
+                                         help='also record each statement of multi-statement sql files, to drill into the slowest one',
+                                         key='_statement_metrics', on_change=store_value, args=['statement_metrics'])
     load_value('jobid_prefix')
     job_id_prefix = cols[1].text_input('job id prefix for clickzetta sql (optional)',
                                        help='if not specified, job id prefix will be empty',
@@ -233,6 +311,10 @@ with col_conf_and_run:
     failure_rate = cols[1].slider('stop test if failure rate reach', 0, 100, 10, 1,
                                   help='test will stop if failure rate of sqls exceeds this value',
                                   key='_stop_fail_rate', on_change=store_value, args=['stop_fail_rate'])
+    load_value('query_timeout')
+    query_timeout = cols[1].number_input('query timeout in seconds (optional)', value=0, min_value=0, step=1,
+                                         help='sql running longer than this will be cancelled, 0 means no timeout',
+                                         key='_query_timeout', on_change=store_value, args=['query_timeout'])
 
 in_running_state = 'running_pid' in st.session_state and 'running_test' in st.session_state
 
@@ -306,8 +388,10 @@ elif run:
         jvm_param = f'--add-opens=java.base/java.nio=ALL-UNNAMED {jvm_param}'
     if not conf_path:
         stdout.error('please select a config file')
-    elif not sql_path:
-        stdout.error('please select sql files')
+    elif ingest_table and not ingest_schema and not ingest_data:
+        stdout.error('please specify schema or csv files to ingest')
+    elif not sql_path and not replay_log and not ingest_table:
+        stdout.error('please select sql files or a query log')
     else:
         now = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
         conf = conf_path.split(os.sep)[1].split(".")[0]
@@ -327,13 +411,29 @@ elif run:
               f' -cp {":".join(classpath)}' + \
               ' com.clickzetta.jdbc_stress_tool.Main' + \
               f' -c {conf_path}' + \
-              f' -q {sql_path}' + \
               f' -r {str(repeat)}' + \
               f' -t {str(thread)}' + \
               f' -f {str(failure_rate)}' + \
               f' -o {output_csv}'
+        if sql_path:
+            cmd += f' -q {sql_path}'
+        if replay_log:
+            cmd += f' --replay {replay_log} --speed {str(replay_speed)}'
+            if replay_session:
+                cmd += ' --session'
+        if ingest_table:
+            cmd += f' --ingest {ingest_table} --rows {str(ingest_rows)}' + \
+                   f' --batch {str(ingest_batch)} --commit {str(ingest_commit)}'
+            if ingest_data:
+                cmd += f' --data {",".join(ingest_data)}'
+            else:
+                cmd += f' --schema {ingest_schema.replace(" ", "")}'
         if job_id_prefix != "":
             cmd += f' --prefix {job_id_prefix}'
+        if statement_metrics:
+            cmd += ' --statements'
+        if query_timeout > 0:
+            cmd += f' --timeout {str(query_timeout)}'
         status.update(label=f'Runing: {test}\n\n{cmd}', state='running')
         log = open(output_log, 'w')
         process = subprocess.Popen(cmd.split(), stdout=log, stderr=subprocess.STDOUT)
@@ -380,7 +480,13 @@ if csv:
     except Exception as ex:
         st.warning(f'Failed to read {csv}, reason {ex}')
 
+df_statements = None
 if df is not None:
+    df, df_statements = split_statements(df)
+
+if df is not None and 'batch_rows' in df.columns:
+    show_ingestion_report(df)
+elif df is not None:
     duration = df['client_end_ms'].max() - df['client_start_ms'].min()
     qps = 1000.0 * len(df) / duration
     st.code('current sql count {:,} \t time elapsed {:,} ms \t qps {:.3f}'.format(len(df), duration, qps))
@@ -397,16 +503,13 @@ if df is not None:
     df['overhead_ms'] = df['client_duration_ms'] - df['server_duration_ms']
     df['server_queue_ms'] = df['server_start_ms'] - df['server_submit_ms']
     df['server_exec_ms'] = df['server_end_ms'] - df['server_start_ms']
-    df['gateway_overhead_ms'] = df['gateway_end_ms'] - df['gateway_start_ms'] - df['server_queue_ms'] - df['server_exec_ms']
-    df['sdk_overhead_ms'] = df['client_duration_ms'] - (df['client_response_ms'] - df['client_request_ms'])
-    df['network_ms'] = df['overhead_ms'] - df['gateway_overhead_ms'] - df['sdk_overhead_ms']
+    add_phase_columns(df)
 
     if row_count >= RENDER_LIMIT:
         st.warning(f'too many data({row_count} rows), no detailed duration distribution chart')
     else: # detailed charts
         df_table = df[['thread_name', 'sql_id', 'job_id', 'is_success', 'result_size',
                 'client_duration_ms', 'server_duration_ms',
-                # 'overhead_ms', 'sdk_overhead_ms', 'gateway_overhead_ms', 'network_ms',
                 'server_queue_ms', 'server_exec_ms']]
         st.markdown('### Duration table')
         st.dataframe(df_table, height=400, use_container_width=True, hide_index=True)
@@ -457,6 +560,12 @@ if df is not None:
     ).interactive()
     st.altair_chart(c, use_container_width=True)
 
+    show_latency_heatmap(df, duration_col)
+
+    show_phase_breakdown(df, step)
+
+    show_connection_acquire(df, step)
+
     # qps chart
     st.markdown('#### QPS Chart')
     df_qps = df[['n_client_end_ms', 'client_duration_ms']]
@@ -472,6 +581,7 @@ if df is not None:
     ).encode(
         x=alt.X('time', title='time(s)')
     ).interactive()
+    c = overlay_client_samples(c, load_client_samples(csv, df['client_start_ms'].min()))
     st.altair_chart(c, use_container_width=True)
 
     # profile dataframe
@@ -500,3 +610,5 @@ if df is not None:
 
     st.dataframe(stats[['sql_id', 'count', 'success_rate', 'min', '25%', 'median', 'mean', '75%', '90%', '95%', '99%', 'max']],
                  use_container_width=True, hide_index=True)
+
+    show_statement_drilldown(df, df_statements, duration_col)
@@ -5,6 +5,9 @@ import os
 import datetime
 import shutil
 import altair as alt
+from report import show_ingestion_report, add_phase_columns, show_phase_breakdown, \
+    split_statements, show_statement_drilldown, load_client_samples, overlay_client_samples, \
+    show_connection_acquire, show_latency_heatmap
 from pathlib import Path
 
 st.title('JDBC Stress Test Data Viewer')
@@ -144,10 +147,13 @@ if selected_test:
         duration_col = cols[1].selectbox('select duration type', ['client_duration_ms', 'server_duration_ms'])
         try:
             df = pd.read_csv(csv_file)
+            df, df_statements = split_statements(df)
         except Exception as ex:
             st.warning(f'Failed to read {csv_file}, reason {ex}')
 
-        if df is not None:
+        if df is not None and 'batch_rows' in df.columns:
+            show_ingestion_report(df)
+        elif df is not None:
             duration = df['client_end_ms'].max() - df['client_start_ms'].min()
             qps = 1000.0 * len(df) / duration
             st.code('current sql count {:,} \t time elapsed {:,} ms \t qps {:.3f}'.format(len(df), duration, qps))
@@ -164,16 +170,13 @@ if selected_test:
             df['overhead_ms'] = df['client_duration_ms'] - df['server_duration_ms']
             df['server_queue_ms'] = df['server_start_ms'] - df['server_submit_ms']
             df['server_exec_ms'] = df['server_end_ms'] - df['server_start_ms']
-            df['gateway_overhead_ms'] = df['gateway_end_ms'] - df['gateway_start_ms'] - df['server_queue_ms'] - df['server_exec_ms']
-            df['sdk_overhead_ms'] = df['client_duration_ms'] - (df['client_response_ms'] - df['client_request_ms'])
-            df['network_ms'] = df['overhead_ms'] - df['gateway_overhead_ms'] - df['sdk_overhead_ms']
+            add_phase_columns(df)
 
             if row_count >= RENDER_LIMIT:
                 st.warning(f'too many data({row_count} rows), no detailed duration distribution chart')
             else: # detailed charts
                 df_table = df[['thread_name', 'sql_id', 'job_id', 'is_success', 'result_size',
                         'client_duration_ms', 'server_duration_ms',
-                        # 'overhead_ms', 'sdk_overhead_ms', 'gateway_overhead_ms', 'network_ms',
                         'server_queue_ms', 'server_exec_ms']]
                 st.markdown('### Duration table')
                 st.dataframe(df_table, height=400, use_container_width=True, hide_index=True)
@@ -224,6 +227,12 @@ if selected_test:
             ).interactive()
             st.altair_chart(c, use_container_width=True)
 
+            show_latency_heatmap(df, duration_col)
+
+            show_phase_breakdown(df, step)
+
+            show_connection_acquire(df, step)
+
             # qps chart
             st.markdown('#### QPS Chart')
             df_qps = df[['n_client_end_ms', 'client_duration_ms']]
@@ -239,8 +248,30 @@ if selected_test:
             ).encode(
                 x=alt.X('time', title='time(s)')
             ).interactive()
+            c = overlay_client_samples(c, load_client_samples(csv_file, df['client_start_ms'].min()))
             st.altair_chart(c, use_container_width=True)
 
+            # error rate chart
+            if 'error_class' in df.columns:
+                st.markdown('#### Error Rate Chart')
+                df_error = df[['n_client_end_ms', 'error_class']].copy()
+                df_error['time'] = df_error['n_client_end_ms'] // qps_step * qps_step / 1000
+                df_total = df_error.groupby('time').size().rename('total').reset_index()
+                df_error = df_error[df_error['error_class'] != 'NONE']
+                if df_error.empty:
+                    st.info('no failed sql')
+                else:
+                    df_error = df_error.groupby(['time', 'error_class']).size().rename('count').reset_index()
+                    df_error = pd.merge(df_error, df_total, on='time')
+                    df_error['error_rate'] = 100.0 * df_error['count'] / df_error['total']
+                    c = alt.Chart(df_error).mark_bar().encode(
+                        x=alt.X('time', title='time(s)'),
+                        y=alt.Y('error_rate', title='error rate(%)', stack='zero'),
+                        color='error_class',
+                        detail=['count', 'total']
+                    ).interactive()
+                    st.altair_chart(c, use_container_width=True)
+
             # profile dataframe
             st.markdown(f'#### SQL Profile Table: {duration_col}')
             stats = df.groupby('sql_id')[duration_col].agg(['count', 'min', 'max', 'mean', 'median'])
@@ -267,3 +298,59 @@ if selected_test:
 
             st.dataframe(stats[['sql_id', 'count', 'success_rate', 'min', '25%', 'median', 'mean', '75%', '90%', '95%', '99%', 'max']],
                         use_container_width=True, hide_index=True)
+
+            show_statement_drilldown(df, df_statements, duration_col)
+
+            # replayed query log: recorded vs replayed latency
+            if 'recorded_duration_ms' in df.columns and (df['recorded_duration_ms'] >= 0).any():
+                st.markdown(f'#### Replay Comparison: recorded_duration_ms vs {duration_col}')
+                df_replayed = df[df['recorded_duration_ms'] >= 0]
+                # failed replays, eg. pool exhausted near 0ms or timeouts cut at timeout, would skew latency
+                df_replay = df_replayed[df_replayed['is_success'] == True]
+                recorded = df_replay.groupby('sql_id')['recorded_duration_ms'].agg(
+                    ['count', 'mean', percentile(50), percentile(95), percentile(99)])
+                replayed = df_replay.groupby('sql_id')[duration_col].agg(
+                    ['mean', percentile(50), percentile(95), percentile(99)])
+                compare = pd.merge(recorded.add_prefix('recorded.'), replayed.add_prefix('replayed.'),
+                                   on='sql_id').reset_index()
+                compare['P95 ratio'] = compare['replayed.P95'] / compare['recorded.P95'].replace(0, np.nan)
+                failed = (df_replayed['is_success'] != True).groupby(df_replayed['sql_id']).sum()
+                compare = pd.merge(compare, failed.rename('failed').reset_index(), on='sql_id', how='outer')
+                if 'scheduled_ms' in df_replayed.columns and (df_replayed['scheduled_ms'] > 0).any():
+                    # queueing behind busy workers is not part of duration, but delays the arrival
+                    scheduled = df_replayed[df_replayed['scheduled_ms'] > 0]
+                    lag = (scheduled['client_start_ms'] - scheduled['scheduled_ms']).groupby(scheduled['sql_id'])
+                    lag = lag.agg(['mean', percentile(95), 'max'])
+                    compare = pd.merge(compare, lag.add_prefix('arrival_lag.').reset_index(), on='sql_id', how='left')
+                compare = compare.rename(columns={'recorded.count': 'count'}).sort_values('P95 ratio', ascending=False)
+                st.dataframe(compare, use_container_width=True, hide_index=True)
+
+                if not df_replay.empty:
+                    df_scatter = df_replay[['sql_id', 'recorded_duration_ms', duration_col]]
+                    if len(df_scatter) > RENDER_LIMIT:
+                        df_scatter = df_scatter.sample(RENDER_LIMIT, random_state=0)
+                    max_ms = max(df_scatter['recorded_duration_ms'].max(), df_scatter[duration_col].max())
+                    c = alt.layer(
+                        alt.Chart(df_scatter).mark_point(filled=True, opacity=0.5).encode(
+                            x=alt.X('recorded_duration_ms', title='recorded duration(ms)'),
+                            y=alt.Y(duration_col, title='replayed duration(ms)'),
+                            color='sql_id'),
+                        alt.Chart(pd.DataFrame({'x': [0, max_ms], 'y': [0, max_ms]})).mark_line(
+                            color='gray', strokeDash=[4, 4]).encode(x='x', y='y')
+                    ).interactive()
+                    st.altair_chart(c, use_container_width=True)
+
+            # replayed query log: delay between scheduled arrival and actual start
+            if 'scheduled_ms' in df.columns and (df['scheduled_ms'] > 0).any():
+                st.markdown('#### Replay Arrival Lag: client_start_ms - scheduled_ms')
+                df_lag = df[df['scheduled_ms'] > 0][['n_client_start_ms', 'client_start_ms', 'scheduled_ms']].copy()
+                df_lag['arrival_lag_ms'] = df_lag['client_start_ms'] - df_lag['scheduled_ms']
+                df_lag['time'] = df_lag['n_client_start_ms'] // step * step
+                df_lag = df_lag.groupby('time')['arrival_lag_ms'].agg(['mean', percentile(95), 'max'])
+                df_lag = df_lag.reset_index().melt('time', var_name='statistic', value_name='lag(ms)')
+                c = alt.Chart(df_lag).mark_line(point=True).encode(
+                    x=alt.X('time', title='time(ms)'),
+                    y=alt.Y('lag(ms)'),
+                    color='statistic'
+                ).interactive()
+                st.altair_chart(c, use_container_width=True)